@@ -0,0 +1,110 @@
+"""
+Startup benchmark for the `divein <id>` fast path
+
+Measures, in fresh interpreters against a throwaway HOME:
+  - importing divein.__main__
+  - a key-auth `divein <nickname>` up to the point ssh would be exec'd,
+    including its DNS cache lookup
+
+Fails if either exceeds its budget (milliseconds over a bare `python -c pass`)
+or if the fast path loads any heavy dependency.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--import-budget MS] [--connect-budget MS]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["typer", "click", "rich", "cryptography", "pexpect", "sqlite3"]
+
+FAST_PATH = """
+import os, sys, json
+sys.argv = ["divein", "bench-host"]
+def fake_exec(file, args):
+    heavy = [m for m in %r if m in sys.modules]
+    print(json.dumps({"argv": args, "heavy": heavy}))
+    sys.stdout.flush()
+    os._exit(0)
+os.execvp = fake_exec
+from divein.__main__ import main
+main()
+""" % (HEAVY_MODULES,)
+
+def make_home():
+    """Create a HOME with a small database holding one key-auth host"""
+    home = tempfile.mkdtemp(prefix="divein-bench-")
+    os.makedirs(os.path.join(home, ".divein"))
+    database = {
+        str(i): {"nickname": f"host-{i}", "username": "root", "host": f"10.0.{i // 256}.{i % 256}",
+                 "port": 22, "password": "", "encrypted_password": None, "encryption_salt": None,
+                 "ssh_key": "~/.ssh/id_ed25519", "handshake": ""}
+        for i in range(1, 100)
+    }
+    database["100"] = dict(database["1"], nickname="bench-host", host="bench-host.example")
+    with open(os.path.join(home, ".divein", "database.json"), "w") as f:
+        json.dump(database, f)
+    # A fresh DNS cache entry, so the cached-address lookup is on the path
+    os.makedirs(os.path.join(home, ".divein", "dns"))
+    now = time.time()
+    with open(os.path.join(home, ".divein", "dns", "bench-host.example"), "w") as f:
+        f.write(f"{now} {now + 86400} 10.0.0.1\n")
+    return home
+
+def time_python(code, env, runs):
+    """Median wall time in ms of running code in a fresh interpreter"""
+    samples = []
+    output = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], env=env,
+                                capture_output=True, text=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+        output = result.stdout
+    return statistics.median(samples), output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--import-budget", type=float, default=30.0,
+                        help="Allowed ms for importing divein.__main__ (default: 30)")
+    parser.add_argument("--connect-budget", type=float, default=70.0,
+                        help="Allowed ms for the fast connect path (default: 70)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, HOME=make_home(), PYTHONPATH=REPO, DIVEIN_MUX="0")
+    env.pop("DIVEIN_BACKEND", None)
+
+    baseline, _ = time_python("pass", env, args.runs)
+    import_ms, _ = time_python("import divein.__main__", env, args.runs)
+    connect_ms, output = time_python(FAST_PATH, env, args.runs)
+    fast = json.loads(output)
+
+    import_ms -= baseline
+    connect_ms -= baseline
+    print(f"python startup:        {baseline:7.1f} ms")
+    print(f"import divein.__main__:{import_ms:7.1f} ms (budget {args.import_budget:.0f})")
+    print(f"fast connect path:     {connect_ms:7.1f} ms (budget {args.connect_budget:.0f})")
+
+    failures = []
+    if import_ms > args.import_budget:
+        failures.append("import time over budget")
+    if connect_ms > args.connect_budget:
+        failures.append("fast connect path over budget")
+    if fast["heavy"]:
+        failures.append(f"fast path imported {', '.join(fast['heavy'])}")
+    if fast["argv"][-1] != "root@bench-host.example" or "HostName=10.0.0.1" not in fast["argv"]:
+        failures.append(f"fast path built unexpected argv {fast['argv']}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
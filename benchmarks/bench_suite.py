@@ -0,0 +1,241 @@
+"""
+Benchmark suite over synthetic inventories
+
+For each inventory size, a worker process runs against a throwaway HOME
+holding that many generated hosts and times:
+  - save_database / load_database (cold, fresh storage each run)
+  - selector evaluation on large ranges with exclusions, and nickname globs
+  - reindex_database
+  - print_table rendering (to an in-memory console)
+  - cold CLI startup: `divein show <id>` in a fresh interpreter, both the
+    first run after the save (which rebuilds the lookup index) and later runs
+Plus, once per run: derive_key and cold `divein --help`.
+
+Results are written as JSON ({"meta": ..., "results": {"name/size": ms}})
+so runs can be compared. The run fails if a result exceeds its budget in
+benchmarks/thresholds.json, or is more than --tolerance slower than the
+same result in a --baseline file.
+
+Usage: python benchmarks/bench_suite.py [--sizes 10,1000,100000] [--full]
+           [--backend json] [--output FILE] [--baseline FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+DEFAULT_SIZES = [10, 1000, 100000]
+FULL_SIZES = DEFAULT_SIZES + [1000000]
+
+# Tables beyond this many rows are not rendered (about a minute at 100k;
+# 'divein list' switches to the browser long before that)
+TABLE_MAX = 10000
+
+# Differences below this many ms are noise, whatever the percentage
+NOISE_MS = 5.0
+
+def make_database(size):
+    """Generate size hosts: a mix of key and password auth, all nicknamed"""
+    database = {}
+    for i in range(1, size + 1):
+        database[i] = {
+            "nickname": f"host-{i}",
+            "username": "root" if i % 3 else "deploy",
+            "host": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "port": 22,
+            "password": "",
+            "encrypted_password": None if i % 4 else "gAAAAAB" + "x" * 93,
+            "encryption_salt": None,
+            "ssh_key": "~/.ssh/id_ed25519" if i % 4 else "",
+            "handshake": "",
+        }
+    return database
+
+def timed(func, runs):
+    """Median wall time of func() in ms, and its last result"""
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+def runs_for(size):
+    """Fewer repetitions for the big inventories"""
+    return 5 if size <= 1000 else (3 if size <= 100000 else 1)
+
+def worker(size):
+    """Run the in-process benchmarks for one size; HOME is already isolated"""
+    sys.path.insert(0, REPO)
+    from divein import database as db
+    from divein.commands.delete import reindex_database
+    from divein.selector import select
+    from divein.commands.list import print_table
+
+    runs = runs_for(size)
+    results = {}
+    database = make_database(size)
+
+    def fresh_storage():
+        db._storage = None
+        return db.get_storage()
+
+    fresh_storage()
+    results["save_database"], _ = timed(lambda: db.save_database(database), runs)
+
+    def cold_load():
+        fresh_storage()
+        return db.load_database()
+    results["load_database"], loaded = timed(cold_load, runs)
+    assert len(loaded) == size, f"loaded {len(loaded)} of {size} hosts"
+
+    results["host_index"], index = timed(lambda: db.HostIndex(loaded), runs)
+    half = size // 2
+    ranges = f"1-{half},{half + 1}-{size},{size // 3}-{size // 3 * 2},!host-1,!{size + 1}-"
+    results["select.ranges"], selection = timed(lambda: select(ranges, index), runs)
+    assert len(selection) == size - 1 and selection.unmatched == [f"!{size + 1}-"]
+    results["select.glob"], _ = timed(lambda: select("host-1*,host-2?,!host-1", index), runs)
+    results["reindex_database"], _ = timed(lambda: reindex_database(loaded), runs)
+
+    if size <= TABLE_MAX:
+        def render():
+            with contextlib.redirect_stdout(io.StringIO()):
+                print_table()
+        results["print_table"], _ = timed(render, max(1, runs // 2))
+
+    results["cli_show.first"], _ = cli_time(["show", str(size)], 1)
+    results["cli_show"], _ = cli_time(["show", str(size)], runs)
+    return results
+
+def cli_time(args, runs):
+    """Median ms of `python -m divein <args>` in fresh interpreters, minus bare startup"""
+    def run(argv):
+        return subprocess.run(argv, env=dict(os.environ, PYTHONPATH=REPO),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    baseline, _ = timed(lambda: run([sys.executable, "-c", "pass"]), runs)
+    total, result = timed(lambda: run([sys.executable, "-m", "divein"] + args), runs)
+    if result.returncode != 0:
+        raise RuntimeError(f"divein {' '.join(args)} exited with {result.returncode}")
+    return total - baseline, result
+
+def run_size(size, backend):
+    """Run worker(size) in a subprocess with its own HOME"""
+    home = tempfile.mkdtemp(prefix="divein-bench-")
+    try:
+        env = dict(os.environ, HOME=home, DIVEIN_BACKEND=backend, DIVEIN_MUX="0")
+        env.pop("DIVEIN_TRACE", None)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(size)],
+            env=env, capture_output=True, text=True,
+        )
+        if output.returncode != 0:
+            raise RuntimeError(f"worker for {size} hosts failed:\n{output.stderr}")
+        return json.loads(output.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+def run_global():
+    """Size-independent benchmarks"""
+    sys.path.insert(0, REPO)
+    from divein.crypto import derive_key
+    results = {}
+    results["derive_key"], _ = timed(lambda: derive_key("benchmark"), 3)
+    home = tempfile.mkdtemp(prefix="divein-bench-")
+    try:
+        os.environ["HOME"] = home
+        results["cli_help"], _ = cli_time(["--help"], 5)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def check(results, thresholds, baseline, tolerance):
+    """Return failure messages for results over budget or regressed"""
+    failures = []
+    for name, ms in sorted(results.items()):
+        budget = thresholds.get(name)
+        if budget is not None and ms > budget:
+            failures.append(f"{name}: {ms:.1f} ms over budget {budget:.1f} ms")
+        before = baseline.get(name)
+        if before is not None and ms > before * (1 + tolerance) and ms - before > NOISE_MS:
+            failures.append(f"{name}: {ms:.1f} ms vs baseline {before:.1f} ms (+{(ms / before - 1) * 100:.0f}%)")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated inventory sizes (default: 10,1000,100000)")
+    parser.add_argument("--full", action="store_true", help="Include the 1M-host inventory")
+    parser.add_argument("--backend", default="json", choices=["json", "journal", "sqlite"])
+    parser.add_argument("--output", default=None, help="Write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown vs baseline (default: 0.5 = 50%%)")
+    parser.add_argument("--thresholds", default=THRESHOLDS, help="Budgets JSON (default: benchmarks/thresholds.json)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(worker(args.worker)))
+        return 0
+
+    sizes = FULL_SIZES if args.full else [int(s) for s in args.sizes.split(",") if s]
+    results = {}
+    for name, ms in run_global().items():
+        results[name] = round(ms, 3)
+        print(f"{name:<36} {ms:10.1f} ms")
+    for size in sizes:
+        for name, ms in run_size(size, args.backend).items():
+            key = f"{name}/{size}"
+            results[key] = round(ms, 3)
+            print(f"{key:<36} {ms:10.1f} ms")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    thresholds = {}
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    failures = check(results, thresholds, baseline, args.tolerance)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
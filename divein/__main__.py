@@ -1,61 +1,150 @@
 """
 Main CLI entry point
 """
-import typer
-from .commands import list, add, delete, show, update
-from .utils import connect_host
+import time
 
-app = typer.Typer(
-    name="divein",
-    help="DiveIn - SSH Connection Manager",
-    add_completion=False,
-    no_args_is_help=False
-)
+# Reference point for --timings, taken before anything heavy is imported
+_T0 = time.perf_counter()
 
-app.command(name="list", help="List all saved hosts")(list.list_hosts)
-app.command(name="show", help="Show host details")(show.show_hosts)
-app.command(name="add", help="Add a new host")(add.add_host)
-app.command(name="update", help="Update an existing host")(update.update_host)
-app.command(name="delete", help="Delete a host")(delete.delete_host)
-app.command(name="rm", help="Alias for delete")(delete.delete_host)
-@app.command(name="connect", help="Connect to a host", hidden=True)
-def connect_trigger(identifier: str):
-    connect_host(identifier)
+import importlib
+import os
+import sys
+from . import trace
 
-@app.callback(invoke_without_command=True)
-def cli_root(
-    ctx: typer.Context,
-    version: bool = typer.Option(False, "--version", "-v", help="Show the version and exit", is_eager=True)
-):
+# Command name -> (module in divein.commands, attribute, help).
+# Modules are imported only when their command runs, or when help has
+# to list every command. Attributes named 'app' are Typer sub-apps.
+COMMANDS = {
+    "list": ("list", "list_hosts", "List all saved hosts"),
+    "show": ("show", "show_hosts", "Show host details"),
+    "add": ("add", "add_host", "Add a new host"),
+    "update": ("update", "update_host", "Update an existing host"),
+    "delete": ("delete", "delete_host", "Delete a host"),
+    "rm": ("delete", "delete_host", "Alias for delete"),
+    "renumber": ("delete", "renumber_ids", "Renumber hosts 1..n, closing gaps left by deletes"),
+    "tags": ("tags", "list_tags", "List host tags"),
+    "exec": ("exec", "exec_hosts", "Run a command on many hosts in parallel"),
+    "ping": ("ping", "ping_hosts", "Check which hosts are reachable"),
+    "import": ("importer", "import_hosts", "Import hosts from ssh config, CSV or JSONL"),
+    "export": ("export", "export_hosts", "Export hosts as JSONL, CSV or ssh config"),
+    "rekey": ("vault", "vault_rekey", "Change the master password"),
+    "agent": ("agent", "app", "Manage the key agent"),
+    "vault": ("vault", "app", "Manage the master-password vault"),
+    "mux": ("mux", "app", "Manage shared SSH connections"),
+    "prewarm": ("prewarm", "prewarm_hosts", "Open shared connections to the most used hosts"),
+    "resolve": ("resolve", "resolve_hosts", "Resolve and cache host addresses"),
+    "kdf": ("kdf", "app", "Tune master password key derivation"),
+}
+
+def build_app(only=None):
     """
-    DiveIn - Simple SSH Connection Manager.
-    
-    run 'divein <id>' or 'divein <nickname>' to connect.
+    Build the Typer app. With only set, just that command is imported
+    and registered; otherwise every command is (for help output).
     """
-    # If version flag is set, print version and exit
-    if version:
-        print("divein 1.0.9")
-        return
+    with trace.span("import typer"):
+        import typer
+    
+    app = typer.Typer(
+        name="divein",
+        help="DiveIn - SSH Connection Manager",
+        add_completion=False,
+        no_args_is_help=False
+    )
+    
+    for name, (module_name, attr, help_text) in COMMANDS.items():
+        if only is not None and name != only:
+            continue
+        with trace.span(f"import {module_name}"):
+            module = importlib.import_module(f".commands.{module_name}", __package__)
+        target = getattr(module, attr)
+        if attr == "app":
+            app.add_typer(target, name=name, help=help_text)
+        else:
+            app.command(name=name, help=help_text)(target)
+    
+    @app.command(name="connect", help="Connect to a host", hidden=True)
+    def connect_trigger(identifier: str):
+        from .utils import connect_host
+        connect_host(identifier)
+    
+    @app.callback(invoke_without_command=True)
+    def cli_root(
+        ctx: typer.Context,
+        version: bool = typer.Option(False, "--version", "-v", help="Show the version and exit", is_eager=True)
+    ):
+        """
+        DiveIn - Simple SSH Connection Manager.
+        
+        run 'divein <id>' or 'divein <nickname>' to connect.
+        """
+        # If version flag is set, print version and exit
+        if version:
+            print("divein 1.0.9")
+            return
+    
+        # If no subcommand and no injected connect, show help
+        if ctx.invoked_subcommand is None:
+            print(ctx.get_help())
+    
+    return app
 
-    # If no subcommand and no injected connect, show help
-    if ctx.invoked_subcommand is None:
-        print(ctx.get_help())
+def fast_connect(identifier):
+    """
+    Connect without building the CLI: resolve the host and exec ssh in
+    place of this process. Only hosts that need no password qualify.
+    Returns False if the normal connect path should handle it.
+    """
+    with trace.span("import database"):
+        from .database import find_host
+        from .ssh import build_ssh_command, needs_password
+        from . import jump
+    
+    try:
+        host_id, host_data = find_host(identifier)
+    except Exception:
+        return False
+    try:
+        # Bastions without a live master are logged into on the normal path
+        if host_data is None or needs_password(host_data) or not jump.ready(host_data):
+            return False
+        ssh_command = build_ssh_command(host_data, refresh_dns=True)
+    except jump.JumpError:
+        return False
+    from .stats import on_connect
+    on_connect(host_id, host_data, ssh_command)
+    # atexit handlers don't survive exec, so write the trace now
+    trace.mark("exec ssh")
+    trace.finish()
+    try:
+        os.execvp(ssh_command[0], ssh_command)
+    except OSError:
+        return False
 
 def main():
     """Entry point for console_scripts"""
-    import sys
+    trace.setup(sys.argv, _T0)
+    only = None
     
     # Support `divein <id>` shortcut via sys.argv patching
     # If the first argument is not a known command, assume it's a host identifier for 'connect'
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
-        known_commands = ["add", "list", "delete", "rm", "show", "connect", "help", "--help", "-h", "--install-completion", "--show-completion"]
         
         # If it's not a flag and not a known command, treat it as `connect <arg>`
-        if not cmd.startswith("-") and cmd not in known_commands:
+        if not cmd.startswith("-") and cmd not in COMMANDS and cmd not in ("connect", "help"):
+            if len(sys.argv) == 2:
+                fast_connect(cmd)
             sys.argv.insert(1, "connect")
-            
-    app()
+            cmd = "connect"
+        
+        # A single command only needs its own module
+        if cmd in COMMANDS or cmd == "connect":
+            only = cmd
+    
+    with trace.span("build cli"):
+        app = build_app(only)
+    with trace.span(f"command {only or 'help'}"):
+        app()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,164 @@
+"""
+Key agent - caches derived keys in memory across divein invocations
+
+Like ssh-agent, the agent listens on a Unix socket that only the owner can
+reach and keeps unlocked key material in memory until it expires or is
+locked. The master password itself is never sent to the agent; clients
+derive a key once and hand the result over, keyed by its salt (or, for the
+vault, by the vault id).
+
+Protocol: one JSON request line, one JSON response line per connection.
+"""
+import json
+import os
+import socket
+import time
+from .database import DB_DIR, ensure_db_dir
+from .sockets import peer_uid
+
+def get_socket_path():
+    """Return the agent socket path"""
+    return os.environ.get("DIVEIN_AGENT_SOCK") or str(DB_DIR / "agent.sock")
+
+def request(op, timeout=2.0, **params):
+    """
+    Send a request to the running agent.
+    Returns the response dict, or None if no agent is listening.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(get_socket_path())
+            sock.sendall((json.dumps(dict(params, op=op)) + "\n").encode())
+            with sock.makefile('r') as f:
+                line = f.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+def get_key(salt_hex):
+    """Return a cached key for salt_hex (or a vault id) from the agent, or None"""
+    response = request("get", salt=salt_hex)
+    if response and response.get("key"):
+        return response["key"].encode()
+    return None
+
+def add_key(salt_hex, key):
+    """Hand a derived key to the agent. Returns False if no agent is running"""
+    response = request("add", salt=salt_hex, key=key.decode())
+    return bool(response and response.get("ok"))
+
+class KeyCache:
+    """In-memory keys with per-entry expiry"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.keys = {}
+
+    def purge(self):
+        now = time.monotonic()
+        for salt in [s for s, (_, expires) in self.keys.items() if expires <= now]:
+            del self.keys[salt]
+
+    def add(self, salt, key, ttl=None):
+        self.keys[salt] = (key, time.monotonic() + (ttl or self.ttl))
+
+    def get(self, salt):
+        self.purge()
+        entry = self.keys.get(salt)
+        return entry[0] if entry else None
+
+    def lock(self):
+        self.keys.clear()
+
+def handle(cache, req):
+    """Apply one request to the cache and return the response dict"""
+    op = req.get("op")
+    if op == "get":
+        key = cache.get(req.get("salt"))
+        return {"ok": key is not None, "key": key}
+    if op == "add":
+        cache.add(req["salt"], req["key"], req.get("ttl"))
+        return {"ok": True}
+    if op == "lock":
+        cache.lock()
+        return {"ok": True}
+    if op == "status":
+        cache.purge()
+        now = time.monotonic()
+        expires = [int(e - now) for _, e in cache.keys.values()]
+        return {"ok": True, "pid": os.getpid(), "keys": len(expires),
+                "expires_in": max(expires) if expires else 0, "ttl": cache.ttl}
+    if op == "stop":
+        return {"ok": True, "stop": True}
+    return {"ok": False, "error": f"unknown op '{op}'"}
+
+def serve(ttl):
+    """Run the agent loop in the current process until a stop request"""
+    ensure_db_dir()
+    os.chmod(DB_DIR, 0o700)
+    path = get_socket_path()
+    if os.path.exists(path):
+        os.unlink(path)
+
+    cache = KeyCache(ttl)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, 0o600)
+    server.listen(16)
+    # Wake up periodically so expired keys are dropped even when idle
+    server.settimeout(30)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                cache.purge()
+                continue
+            with conn:
+                if peer_uid(conn) != os.getuid():
+                    continue
+                conn.settimeout(5)
+                try:
+                    with conn.makefile('r') as f:
+                        req = json.loads(f.readline())
+                    response = handle(cache, req)
+                    conn.sendall((json.dumps(response) + "\n").encode())
+                except (OSError, ValueError, KeyError):
+                    continue
+                if response.get("stop"):
+                    break
+    finally:
+        cache.lock()
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def start(ttl):
+    """Fork a detached agent. Returns the child's PID"""
+    pid = os.fork()
+    if pid:
+        # Wait for the intermediate child; the daemon is reparented to init
+        os.waitpid(pid, 0)
+        for _ in range(50):
+            status = request("status")
+            if status:
+                return status["pid"]
+            time.sleep(0.05)
+        return None
+
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    try:
+        serve(ttl)
+    finally:
+        os._exit(0)
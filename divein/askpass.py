@@ -0,0 +1,155 @@
+"""
+One-shot SSH_ASKPASS channel for password logins
+
+Instead of driving ssh through a pseudo-terminal and proxying every byte
+of the session, divein runs ssh directly on the real terminal with
+SSH_ASKPASS pointing at a small helper script. The helper fetches the
+password from a Unix socket that a thread in the waiting divein process
+serves exactly once, then the socket is removed. The password never
+appears in argv, the environment or on disk.
+
+OpenSSH before 8.4 has no SSH_ASKPASS_REQUIRE and reads the password
+from the terminal instead, so there divein answers the prompt through
+pexpect as it always did.
+"""
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from .database import DB_DIR, ensure_db_dir
+from . import trace
+
+ASKPASS_SCRIPT = DB_DIR / "askpass"
+
+# OpenSSH from this version honours SSH_ASKPASS_REQUIRE
+ASKPASS_REQUIRE_VERSION = (8, 4)
+
+_ssh_version = None
+
+# -S skips site-packages: the helper only needs the socket module
+HELPER = """#!{python} -S
+# divein askpass helper: fetch the password from the waiting divein process
+import os, socket, sys
+try:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(10)
+    sock.connect(os.environ["DIVEIN_ASKPASS_SOCK"])
+    sock.sendall((sys.argv[1] if len(sys.argv) > 1 else "").encode() + b"\\n")
+    data = b""
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+except (KeyError, OSError):
+    sys.exit(1)
+if not data:
+    sys.exit(1)
+sys.stdout.buffer.write(data + b"\\n")
+"""
+
+def ssh_version():
+    """(major, minor) of the local OpenSSH client, or None if unknown"""
+    global _ssh_version
+    if _ssh_version is None:
+        try:
+            result = subprocess.run(["ssh", "-V"], capture_output=True, text=True)
+            match = re.search(r"OpenSSH_(\d+)\.(\d+)", result.stderr + result.stdout)
+        except OSError:
+            match = None
+        _ssh_version = (int(match.group(1)), int(match.group(2))) if match else ()
+    return _ssh_version or None
+
+def supported():
+    """
+    True if ssh will ask through SSH_ASKPASS with a terminal attached.
+    Before 8.4, OpenSSH reads passwords from /dev/tty whenever it can
+    open it and only falls back to askpass without one, so callers
+    must answer the terminal prompt themselves.
+    """
+    version = ssh_version()
+    return version is None or version >= ASKPASS_REQUIRE_VERSION
+
+def helper_path():
+    """Write the helper script if it is missing or stale and return its path"""
+    content = HELPER.format(python=sys.executable)
+    try:
+        with open(ASKPASS_SCRIPT, 'r') as f:
+            if f.read() == content:
+                return str(ASKPASS_SCRIPT)
+    except OSError:
+        pass
+    ensure_db_dir()
+    tmp = ASKPASS_SCRIPT.with_suffix(".tmp")
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.chmod(tmp, 0o700)
+    os.replace(tmp, ASKPASS_SCRIPT)
+    return str(ASKPASS_SCRIPT)
+
+class PasswordServer:
+    """
+    Answer a single askpass request with password, from a background
+    thread. Use as a context manager around the ssh process.
+    """
+
+    def __init__(self, password):
+        self.password = password
+        # Private directory, so only this user can even reach the socket
+        self.dir = tempfile.mkdtemp(prefix="divein-")
+        self.path = os.path.join(self.dir, "askpass.sock")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        self.sock.listen(1)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _serve(self):
+        from .sockets import peer_uid
+        try:
+            conn, _ = self.sock.accept()
+        except OSError:
+            return # Closed before ssh asked
+        with conn:
+            try:
+                prompt = conn.makefile('r').readline()
+                # Only answer password prompts, never e.g. key passphrases
+                if peer_uid(conn) == os.getuid() and "password" in prompt.lower():
+                    # Time from spawn to here is ssh's connect and key exchange
+                    trace.mark("askpass answered")
+                    conn.sendall(self.password.encode())
+            except OSError:
+                pass
+        self.close()
+
+    def env(self):
+        """Environment for the ssh process"""
+        env = dict(os.environ)
+        env["SSH_ASKPASS"] = helper_path()
+        # Use askpass even though a terminal is attached (see supported())
+        env["SSH_ASKPASS_REQUIRE"] = "force"
+        env["DIVEIN_ASKPASS_SOCK"] = self.path
+        return env
+
+    def close(self):
+        self.password = None
+        try:
+            # shutdown wakes a thread blocked in accept()
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
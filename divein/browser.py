@@ -0,0 +1,203 @@
+"""
+Full-screen host browser for large inventories
+
+Only the IDs are loaded up front; records are fetched when their row
+scrolls into view and cached. Each frame is diffed against the previous
+one so only lines that changed are rewritten, and after an update or
+delete only the affected rows are re-fetched.
+"""
+import shutil
+import sys
+from .database import list_ids, get_host
+
+# Escape sequences as delivered by click.getchar()
+KEY_UP = ("\x1b[A", "\x1bOA", "k")
+KEY_DOWN = ("\x1b[B", "\x1bOB", "j")
+KEY_PAGE_UP = ("\x1b[5~",)
+KEY_PAGE_DOWN = ("\x1b[6~", " ")
+KEY_HOME = ("\x1b[H", "\x1b[1~", "\x1bOH")
+KEY_END = ("\x1b[F", "\x1b[4~", "\x1bOF")
+
+HELP = "↑↓/jk move  PgUp/PgDn page  Enter connect  u update  rm <ID> delete  q quit"
+
+class HostBrowser:
+    """Keyboard-driven, windowed view over the host list"""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.ids = list_ids()
+        self.rows = {}
+        self.top = 0
+        self.cursor = 0
+        self.buffer = []
+        self.message = ""
+        self.frame = []
+
+    # Data
+
+    def row(self, host_id):
+        """Rendered text for a host, fetched on first use"""
+        if host_id not in self.rows:
+            data = get_host(host_id) or {}
+            connection = f"{data.get('username', '')}@{data.get('host', '')}:{data.get('port', '')}"
+            self.rows[host_id] = f"{host_id:>7}  {data.get('nickname', '')[:24]:<24}  {connection}"
+        return self.rows[host_id]
+
+    def refresh(self, changed=()):
+        """
+        Pick up changes after an action. Rows in changed are re-fetched;
+        if the set of IDs moved (delete, re-index) every cached row is
+        dropped and only the visible window is fetched again.
+        """
+        ids = list_ids()
+        if ids != self.ids:
+            self.rows = {}
+        for host_id in changed:
+            self.rows.pop(host_id, None)
+        self.ids = ids
+        self.cursor = min(self.cursor, max(len(ids) - 1, 0))
+
+    def selected(self):
+        return self.ids[self.cursor] if self.ids else None
+
+    # Drawing
+
+    def size(self):
+        cols, lines = shutil.get_terminal_size()
+        # Header line, column titles, footer prompt and status line
+        return cols, max(lines - 4, 1)
+
+    def build_frame(self):
+        cols, height = self.size()
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + height:
+            self.top = self.cursor - height + 1
+        
+        total = len(self.ids)
+        lines = [
+            f"\x1b[1mSaved Hosts\x1b[0m  {self.cursor + 1 if total else 0}/{total}",
+            f"\x1b[2m{'ID':>7}  {'Nickname':<24}  User@Host:Port\x1b[0m",
+        ]
+        for i in range(self.top, self.top + height):
+            if i < total:
+                text = self.row(self.ids[i])[:cols]
+                lines.append(f"\x1b[7m{text:<{cols}}\x1b[0m" if i == self.cursor else text)
+            else:
+                lines.append("")
+        lines.append(f"\x1b[2m{(self.message or HELP)[:cols]}\x1b[0m")
+        lines.append(f"> {''.join(self.buffer)}")
+        return lines
+
+    def draw(self):
+        """Rewrite only the screen lines that differ from the last frame"""
+        frame = self.build_frame()
+        parts = []
+        for y, line in enumerate(frame):
+            if y >= len(self.frame) or self.frame[y] != line:
+                parts.append(f"\x1b[{y + 1};1H\x1b[2K{line}")
+        # Leave the cursor at the end of the prompt
+        parts.append(f"\x1b[{len(frame)};{len(frame[-1]) + 1}H")
+        self.out.write("".join(parts))
+        self.out.flush()
+        self.frame = frame
+
+    def enter_screen(self):
+        self.out.write("\x1b[?1049h\x1b[2J")
+        self.frame = []
+
+    def leave_screen(self):
+        self.out.write("\x1b[?1049l")
+        self.out.flush()
+
+    # Input
+
+    def move(self, delta):
+        if self.ids:
+            self.cursor = max(0, min(len(self.ids) - 1, self.cursor + delta))
+
+    def handle_key(self, char):
+        """
+        Apply one keypress. Returns an action tuple for the caller to run
+        outside the full-screen view, 'quit', or None.
+        """
+        _, height = self.size()
+        self.message = ""
+        
+        if char in KEY_UP and (char != "k" or not self.buffer):
+            self.move(-1)
+        elif char in KEY_DOWN and (char != "j" or not self.buffer):
+            self.move(1)
+        elif char in KEY_PAGE_UP:
+            self.move(-height)
+        elif char in KEY_PAGE_DOWN and (char != " " or not self.buffer):
+            self.move(height)
+        elif char in KEY_HOME:
+            self.cursor = 0
+        elif char in KEY_END:
+            self.cursor = max(len(self.ids) - 1, 0)
+        elif char in ("q", "Q") and not self.buffer:
+            return "quit"
+        elif char in ("u", "U") and not self.buffer:
+            return ("update", str(self.selected()))
+        elif char in ("\r", "\n"):
+            choice = "".join(self.buffer).strip()
+            self.buffer = []
+            if not choice:
+                return ("connect", str(self.selected())) if self.ids else None
+            if choice.lower() in ("exit", "quit"):
+                return "quit"
+            for prefix in ("rm ", "delete ", "del "):
+                if choice.startswith(prefix):
+                    return ("delete", choice[len(prefix):].strip())
+            return ("connect", choice)
+        elif char == "\x7f":
+            if self.buffer:
+                self.buffer.pop()
+        elif char == "\x1b":
+            self.buffer = []
+        elif len(char) == 1 and char.isprintable():
+            self.buffer.append(char)
+        return None
+
+def browse_hosts():
+    """Run the browser until the user quits or connects"""
+    import click
+    from .utils import connect_host
+    from .commands.delete import delete_host
+    from .commands.update import update_host
+    
+    browser = HostBrowser()
+    if not browser.ids:
+        print("No hosts saved yet.")
+        print("Use 'divein add' to add your first host.")
+        return
+    
+    browser.enter_screen()
+    try:
+        while True:
+            browser.draw()
+            action = browser.handle_key(click.getchar())
+            if action is None:
+                continue
+            if action == "quit":
+                break
+            
+            kind, target = action
+            browser.leave_screen()
+            if kind == "connect":
+                if connect_host(target):
+                    return
+                click.pause()
+            elif kind == "update":
+                if update_host(target):
+                    browser.refresh(changed=[browser.selected()])
+            elif kind == "delete":
+                if delete_host(target):
+                    browser.refresh()
+                    browser.message = "Deleted."
+            browser.enter_screen()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        browser.leave_screen()
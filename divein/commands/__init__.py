@@ -1 +1,3 @@
-from . import list, add, delete, show, update
+"""
+Subcommands. Each module is imported on demand by divein.__main__.
+"""
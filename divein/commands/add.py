@@ -3,8 +3,9 @@ Add command - Add new SSH hosts
 """
 import typer
 from rich import print
-from ..database import load_database, save_database, get_next_id
-from ..crypto import encrypt_password
+from ..database import save_host, get_next_id, check_nickname, parse_tags, DuplicateNicknameError
+from ..jump import parse_jump, JumpError
+from ..vault import encrypt_host_password
 
 def add_host():
     """Add a new host interactively"""
@@ -13,6 +14,11 @@ def add_host():
     
     # Get host details
     nickname = typer.prompt("Nickname", default="", show_default=False)
+    try:
+        check_nickname(nickname)
+    except DuplicateNicknameError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
     username = typer.prompt("Username")
     host = typer.prompt("Host/IP")
     
@@ -20,8 +26,7 @@ def add_host():
     ssh_key = typer.prompt("SSH Key path (optional, press Enter for password auth)", default="", show_default=False)
     
     password = ""
-    encrypted_data = None
-    encryption_salt = None
+    encrypted_fields = {"encrypted_password": None, "encryption_salt": None}
     
     if ssh_key:
         # Using SSH key - no password needed
@@ -33,23 +38,31 @@ def add_host():
         # Always Ask for Master Password to encrypt
         if password:
              print("[yellow]Encrypting password...[/yellow]")
-             master_password = typer.prompt("Enter Master Password for encryption", hide_input=True)
-             # Encrypt
-             crypto_result = encrypt_password(password, master_password)
-             encrypted_data = crypto_result["encrypted_data"]
-             encryption_salt = crypto_result["salt"]
+             # Encrypt under the vault key (prompts for the Master Password if locked)
+             try:
+                 encrypted_fields = encrypt_host_password(password)
+             except ValueError:
+                 print("[bold red]Failed to unlock vault! Wrong master password?[/bold red]")
+                 return False
              password = "" # Clear plaintext
              print("[bold green]Password encrypted![/bold green]")
     
     # Optional fields with defaults
     port = typer.prompt("Port", default=22, type=int)
     handshake = typer.prompt("Handshake method", default="", show_default=False)
-    
-    # Load existing database
-    database = load_database()
+    try:
+        jump = parse_jump(typer.prompt("Jump host (ID or nickname, optional)", default="", show_default=False))
+    except JumpError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
+    try:
+        tags = parse_tags(typer.prompt("Tags (comma-separated, optional)", default="", show_default=False))
+    except ValueError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
     
     # Get next available ID
-    host_id = get_next_id(database)
+    host_id = get_next_id()
     
     # Prepare host data
     host_data = {
@@ -57,19 +70,18 @@ def add_host():
         "username": username,
         "host": host,
         "password": password,
-        "encrypted_password": encrypted_data,
-        "encryption_salt": encryption_salt,
+        **encrypted_fields,
         "port": port,
         "ssh_key": ssh_key,
-        "handshake": handshake
+        "handshake": handshake,
+        "jump": jump,
+        "tags": tags
     }
     
     # Save to database with numeric ID
-    database[host_id] = host_data
-    
-    if save_database(database):
+    if save_host(host_id, host_data):
         display_name = f"{nickname}: {username}@{host}" if nickname else f"{username}@{host}"
-        auth_type = "SSH Key" if ssh_key else ("Encrypted Password" if encrypted_data else "Password")
+        auth_type = "SSH Key" if ssh_key else ("Encrypted Password" if encrypted_fields["encrypted_password"] else "Password")
         print(f"[bold green]Host '{display_name}' added successfully![/bold green] (ID: {host_id}, Auth: {auth_type})")
         return True
     else:
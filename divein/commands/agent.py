@@ -0,0 +1,58 @@
+"""
+Agent command - Manage the key caching agent
+"""
+import typer
+from rich import print
+from .. import agent
+from ..config import get_setting
+
+app = typer.Typer(help="Manage the key agent that caches unlocked keys", no_args_is_help=True)
+
+@app.command(name="start")
+def start_agent(
+    ttl: int = typer.Option(None, "--ttl", help="Seconds to keep unlocked keys (default: agent_ttl setting)"),
+    foreground: bool = typer.Option(False, "--foreground", help="Run in the foreground"),
+):
+    """Start the agent"""
+    status = agent.request("status")
+    if status:
+        print(f"[yellow]Agent already running (PID {status['pid']})[/yellow]")
+        return
+    
+    ttl = ttl or get_setting("agent_ttl")
+    if foreground:
+        print(f"Agent listening on {agent.get_socket_path()} (TTL {ttl}s)")
+        agent.serve(ttl)
+        return
+    
+    pid = agent.start(ttl)
+    if pid:
+        print(f"[bold green]Agent started[/bold green] (PID {pid}, TTL {ttl}s)")
+    else:
+        print("[bold red]Failed to start agent![/bold red]")
+
+@app.command(name="stop")
+def stop_agent():
+    """Stop the agent and forget all keys"""
+    if agent.request("stop"):
+        print("[green]Agent stopped.[/green]")
+    else:
+        print("[yellow]Agent is not running.[/yellow]")
+
+@app.command(name="lock")
+def lock_agent():
+    """Forget all cached keys but keep the agent running"""
+    if agent.request("lock"):
+        print("[green]Agent locked.[/green]")
+    else:
+        print("[yellow]Agent is not running.[/yellow]")
+
+@app.command(name="status")
+def agent_status():
+    """Show whether the agent is running and holds keys"""
+    status = agent.request("status")
+    if not status:
+        print("[yellow]Agent is not running.[/yellow]")
+        return
+    state = f"{status['keys']} key(s), expires in {status['expires_in']}s" if status["keys"] else "locked"
+    print(f"Agent running (PID {status['pid']}, TTL {status['ttl']}s): {state}")
@@ -3,53 +3,11 @@ Delete command - Remove SSH hosts
 """
 import typer
 from rich import print
-from ..database import load_database, save_database
-
-def parse_identifiers(identifier_str: str, database: dict) -> set:
-    """
-    Parse a string containing IDs, ranges (x-y), and nicknames.
-    Returns a set of Host IDs (integers) to delete.
-    """
-    targets = set()
-    parts = [p.strip() for p in identifier_str.split(",")]
-    
-    for part in parts:
-        if not part:
-            continue
-            
-        # Check for Range (e.g., 4-7)
-        if "-" in part and part.replace("-", "").isdigit():
-            try:
-                start, end = map(int, part.split("-"))
-                if start > end:
-                    start, end = end, start
-                # Add all IDs in range that exist
-                for i in range(start, end + 1):
-                    if i in database:
-                        targets.add(i)
-                continue
-            except ValueError:
-                pass # Fallback to normal processing if split failed
-        
-        # Check for ID
-        if part.isdigit():
-            hid = int(part)
-            if hid in database:
-                targets.add(hid)
-            continue
-            
-        # Check for Nickname
-        found_nick = False
-        for hid, data in database.items():
-            if data.get("nickname") == part:
-                targets.add(hid)
-                found_nick = True
-        
-        # If not found, ignore? or warn? 
-        # For bulk ops, better to ignore invalid and process valid, 
-        # but displaying a warning for typo is helpful.
-    
-    return targets
+from ..config import get_setting
+from ..database import (
+    get_host, get_storage, jump_users, load_database, load_index, remove_hosts, renumber_hosts
+)
+from ..selector import select, warn_unmatched
 
 def reindex_database(database: dict) -> dict:
     """
@@ -67,24 +25,35 @@ def reindex_database(database: dict) -> dict:
 
 def delete_host(identifier_str: str):
     """
-    Delete hosts by ID, nickname, list, or range.
-    Examples: '1', 'snow', '1,2,3', '4-7'
+    Delete hosts by ID, nickname, list, range or glob.
+    Examples: '1', 'snow', '1,2,3', '4-7', 'db-*,!db-main'
     """
-    database = load_database()
-    
-    targets = parse_identifiers(identifier_str, database)
+    compact = get_setting("id_mode") == "compact"
+    if compact:
+        # Renumbering rewrites everything anyway
+        index = load_index()
+        database = index.database
+        targets = select(identifier_str, index)
+    else:
+        # Only the doomed hosts and those jumping through them are read
+        database = None
+        targets = select(identifier_str)
+    warn_unmatched(targets)
     
     if not targets:
         print(f"[bold red]No matching hosts found for '{identifier_str}'[/bold red]")
         return False
     
+    records = {hid: database[hid] if database is not None else get_host(hid) for hid in targets}
+    
     # Show confirmation summary
     print(f"\n[bold red]The following hosts will be DELETED:[/bold red]")
-    print(f"[dim](IDs will be re-ordered afterwards)[/dim]")
+    if compact:
+        print(f"[dim](IDs will be re-ordered afterwards)[/dim]")
     print("=" * 40)
     
-    for hid in sorted(targets):
-        data = database[hid]
+    for hid in targets:
+        data = records[hid]
         nickname = data.get("nickname", "")
         username = data["username"]
         host = data["host"]
@@ -93,22 +62,53 @@ def delete_host(identifier_str: str):
         
     print("=" * 40)
     
+    behind = jump_users(targets)
+    if behind:
+        print(f"[yellow]Hosts {', '.join(map(str, behind))} use these as a jump host; it will be cleared and they will connect directly.[/yellow]")
+    
     confirm = typer.confirm("Proceed with deletion?", default=False)
     
     if not confirm:
         print("[yellow]Deletion cancelled.[/yellow]")
         return False
         
-    # Perform Deletion
-    for hid in targets:
-        del database[hid]
-        
-    # Re-index
-    database = reindex_database(database)
-    
-    if save_database(database):
+    if compact:
+        # Old behaviour: close the gaps with a full rewrite
+        for hid in targets:
+            del database[hid]
+        if renumber_hosts(database) is None:
+            print("[bold red]Failed to save database![/bold red]")
+            return False
         print(f"[bold green]Successfully deleted {len(targets)} host(s) and re-indexed database![/bold green]")
         return True
-    else:
+
+    # Remaining hosts keep their IDs; the deleted ones are retired
+    updates = {hid: dict(get_host(hid), jump=None) for hid in behind}
+    if remove_hosts(targets, updates=updates):
+        print(f"[bold green]Successfully deleted {len(targets)} host(s)![/bold green]")
+        return True
+    print("[bold red]Failed to save database![/bold red]")
+    return False
+
+def renumber_ids(yes: bool = typer.Option(False, "--yes", "-y", help="Don't ask for confirmation")):
+    """
+    Renumber hosts as 1..n, closing the gaps left by deletions.
+    Scripts and aliases using the old IDs will point elsewhere.
+    """
+    database = load_database()
+    moved = sum(1 for new_id, old_id in enumerate(sorted(database.keys()), 1) if new_id != old_id)
+    if not moved:
+        print("[green]IDs are already contiguous.[/green]")
+        # Still forget retired IDs, so the next host gets n+1
+        get_storage().set_next_id(len(database) + 1)
+        return True
+
+    print(f"[bold yellow]{moved} of {len(database)} host(s) will get a new ID.[/bold yellow]")
+    if not yes and not typer.confirm("Renumber?", default=False):
+        print("[yellow]Renumbering cancelled.[/yellow]")
+        return False
+    if renumber_hosts(database) is None:
         print("[bold red]Failed to save database![/bold red]")
-        return False
\ No newline at end of file
+        return False
+    print(f"[bold green]Renumbered {moved} host(s).[/bold green]")
+    return True
\ No newline at end of file
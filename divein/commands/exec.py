@@ -0,0 +1,84 @@
+"""
+Exec command - Run a command on many hosts in parallel
+"""
+import json
+import sys
+import threading
+from typing import List
+import typer
+from rich import print
+from ..database import load_index
+from ..vault import decrypt_host_password, migrate_decrypted
+from ..remote import run_many, host_label
+from .. import jump, mux
+from ..selector import select, warn_unmatched
+
+def exec_hosts(
+    selector: str = typer.Argument(..., help="IDs, ranges, nicknames or globs, e.g. '1-40,db-*,!db-main'"),
+    command: List[str] = typer.Argument(..., help="Command to run (put it after '--')"),
+    workers: int = typer.Option(16, "--workers", "-w", help="Maximum hosts to run on at once"),
+    timeout: float = typer.Option(60, "--timeout", "-t", help="Per-host timeout in seconds"),
+    json_output: bool = typer.Option(False, "--json", help="Collect results and print them as JSON"),
+):
+    """
+    Run a non-interactive command on every selected host at once.
+    Example: divein exec 'web-*' -- uptime
+    """
+    index = load_index()
+    targets = select(selector, index)
+    warn_unmatched(targets)
+    
+    if not targets:
+        print(f"[bold red]No matching hosts found for '{selector}'[/bold red]")
+        raise typer.Exit(1)
+    
+    # Decrypt up front so the vault is unlocked once, before any output
+    jobs = []
+    decrypted = {}
+    for host_id in targets:
+        host_data = index.get(host_id)
+        password = None
+        if not host_data.get("ssh_key") and not mux.is_alive(host_data):
+            if host_data.get("encrypted_password"):
+                try:
+                    password = decrypt_host_password(host_id, host_data, migrate=False)
+                except ValueError:
+                    print("[bold red]Failed to decrypt! Wrong master password?[/bold red]")
+                    raise typer.Exit(1)
+                decrypted[host_id] = (host_data, password)
+            else:
+                password = host_data.get("password") or None
+        jobs.append((host_id, host_data, password))
+    # Legacy records move into the vault in one write, not one per host
+    migrate_decrypted(decrypted)
+    
+    # One login per bastion, shared by every job that goes through it
+    for hop_id, hop in jump.open_masters(host_data for _, host_data, _ in jobs):
+        print(f"[yellow]Could not connect to jump host {hop.get('nickname') or hop['host']} (ID {hop_id}); hosts behind it will fail.[/yellow]")
+    
+    remote_command = " ".join(command)
+    write_lock = threading.Lock()
+    width = max(len(host_label(host_id, host_data)) for host_id, host_data, _ in jobs)
+    
+    def on_line(label, line):
+        with write_lock:
+            sys.stdout.write(f"{label:<{width}} | {line}\n")
+            sys.stdout.flush()
+    
+    results = run_many(
+        jobs, remote_command, workers=workers, timeout=timeout,
+        on_line=None if json_output else on_line
+    )
+    
+    if json_output:
+        sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    else:
+        failed = [r for r in results if r["status"] != "ok"]
+        summary = f"{len(results) - len(failed)}/{len(results)} host(s) succeeded"
+        print(f"\n[bold {'red' if failed else 'green'}]{summary}[/bold {'red' if failed else 'green'}]")
+        for r in failed:
+            code = f" (exit {r['exit_code']})" if r["exit_code"] is not None else ""
+            print(f"  [red]{r['name']}: {r['status']}{code}[/red]")
+    
+    if any(r["status"] != "ok" for r in results):
+        raise typer.Exit(1)
@@ -0,0 +1,71 @@
+"""
+Export command - Stream hosts out as JSONL, CSV or ssh config
+"""
+import os
+import sys
+import typer
+from rich import print
+from ..database import iter_hosts, get_host
+from ..formats import FORMATS, detect_format, host_writer
+
+def export_hosts(
+    output: str = typer.Option("-", "--output", "-o", help="File to write ('-' for stdout)"),
+    fmt: str = typer.Option(None, "--format", "-f", help=f"One of {', '.join(FORMATS)} (default: from the file name, else jsonl)"),
+    decrypt: bool = typer.Option(False, "--decrypt", help="Include plaintext passwords (unlocks the vault once)"),
+):
+    """Export hosts one record at a time"""
+    if fmt is None:
+        fmt = detect_format(output, default="jsonl")
+    if fmt not in FORMATS:
+        print(f"[bold red]Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}[/bold red]", file=sys.stderr)
+        return False
+    if decrypt and fmt == "ssh":
+        print("[yellow]ssh config cannot hold passwords; exporting without them.[/yellow]", file=sys.stderr)
+        decrypt = False
+
+    if output == "-":
+        f = sys.stdout
+        tmp = None
+    else:
+        # Write beside the target and rename, so a failed export leaves no
+        # partial file; plaintext passwords get owner-only permissions
+        tmp = f"{output}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if decrypt else 0o644)
+        f = os.fdopen(fd, 'w', newline='')
+
+    count = 0
+    done = False
+    try:
+        write = host_writer(f, fmt, passwords=decrypt, get_host=get_host)
+        # One record at a time: memory stays flat however large the
+        # inventory is
+        for host_id, record in iter_hosts():
+            password = None
+            if decrypt:
+                password = record.get("password") or None
+                if record.get("encrypted_password"):
+                    from ..vault import decrypt_host_password
+                    # The first record unlocks the vault; the rest reuse its key
+                    password = decrypt_host_password(host_id, record, migrate=False)
+            write(host_id, record, password)
+            count += 1
+        f.flush()
+        done = True
+    except ValueError:
+        print("[bold red]Failed to decrypt! Wrong master password?[/bold red]", file=sys.stderr)
+        return False
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head); silence the final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return False
+    finally:
+        if tmp is not None:
+            f.close()
+            if done:
+                os.replace(tmp, output)
+            elif os.path.exists(tmp):
+                os.remove(tmp)
+
+    if tmp is not None:
+        print(f"[bold green]Exported {count} host(s)[/bold green] to {output}", file=sys.stderr)
+    return True
@@ -0,0 +1,140 @@
+"""
+Import command - Bulk add hosts from ssh config, CSV or JSONL
+"""
+import getpass
+import sys
+import typer
+from rich import print
+from ..database import load_index, get_next_id, save_hosts, connection_string
+from ..formats import FORMATS, detect_format, read_hosts
+from ..jump import chain, JumpError
+
+# How many skipped/invalid entries to list individually
+REPORT_LIMIT = 10
+
+def import_hosts(
+    path: str = typer.Argument(..., help="File to import ('-' for stdin)"),
+    fmt: str = typer.Option(None, "--format", "-f", help=f"One of {', '.join(FORMATS)} (default: from the file name)"),
+    dry_run: bool = typer.Option(False, "--dry-run", "-n", help="Report what would be imported without saving"),
+):
+    """Import hosts from an OpenSSH config, CSV or JSONL file"""
+    if fmt is None:
+        fmt = "jsonl" if path == "-" else detect_format(path)
+    if fmt not in FORMATS:
+        print(f"[bold red]Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}[/bold red]")
+        return False
+
+    # Indexes over existing hosts; new hosts are added as they are read so
+    # duplicates inside the file are caught too
+    index = load_index()
+    next_id = get_next_id()
+    default_user = getpass.getuser()
+
+    added = {}
+    jump_refs = {}
+    duplicates = []
+    invalid = []
+    vault_error = None
+
+    try:
+        f = sys.stdin if path == "-" else open(path, 'r', newline='')
+    except OSError as e:
+        print(f"[bold red]Cannot read {path}: {e.strerror}[/bold red]")
+        return False
+
+    with f:
+        for lineno, host in read_hosts(f, fmt):
+            if isinstance(host, ValueError):
+                invalid.append(f"line {lineno}: {host}")
+                continue
+
+            host.setdefault("username", default_user)
+            nickname = host.get("nickname", "")
+            connection = connection_string(host)
+            if nickname and index.find_nickname(nickname) is not None:
+                duplicates.append(f"line {lineno}: nickname '{nickname}' exists (ID {index.find_nickname(nickname)})")
+                continue
+            if index.find_connection(connection) is not None:
+                duplicates.append(f"line {lineno}: {connection} exists (ID {index.find_connection(connection)})")
+                continue
+
+            password = host.pop("password", "")
+            host_data = {
+                "nickname": nickname,
+                "username": host["username"],
+                "host": host["host"],
+                "password": "",
+                "encrypted_password": None,
+                "encryption_salt": None,
+                "port": host["port"],
+                "ssh_key": host.get("ssh_key", ""),
+                "handshake": host.get("handshake", ""),
+                "jump": None,
+                "tags": host.get("tags", []),
+            }
+            if password and not dry_run and vault_error is None:
+                # One vault unlock for the whole file; each host then only
+                # costs a symmetric encryption under its own data key
+                try:
+                    from ..vault import encrypt_host_password
+                    host_data.update(encrypt_host_password(password))
+                except ValueError:
+                    vault_error = "Failed to unlock vault! Wrong master password?"
+            if vault_error:
+                break
+
+            if host.get("jump"):
+                jump_refs[next_id] = (lineno, host["jump"])
+            index.put(next_id, host_data)
+            added[next_id] = host_data
+            next_id += 1
+
+    if vault_error:
+        print(f"[bold red]{vault_error}[/bold red] Nothing was imported.")
+        return False
+
+    # Jump hosts are named like ssh's ProxyJump, and may come later in the file
+    unresolved = []
+    for host_id, (lineno, ref) in jump_refs.items():
+        # Of a chain 'a,b', b is the hop right in front of the host
+        ref = ref.split(",")[-1].strip()
+        if ref.lower() == "none":
+            continue
+        jump_id = index.find_nickname(ref)
+        if jump_id is None and "@" in ref:
+            jump_id = index.find_connection(ref.rsplit(":", 1)[0] if ref.count(":") == 1 else ref)
+        if jump_id is None:
+            unresolved.append(f"line {lineno}: jump host '{ref}' not found")
+            continue
+        added[host_id]["jump"] = jump_id
+        try:
+            # Refused like in add and update: the chain must not loop
+            chain(added[host_id], get=index.get)
+        except JumpError:
+            added[host_id]["jump"] = None
+            unresolved.append(f"line {lineno}: jump host '{ref}' leads back to this host")
+
+    for label, entries in (("Skipped", duplicates), ("Invalid", invalid), ("Without jump host", unresolved)):
+        if not entries:
+            continue
+        print(f"[yellow]{label} {len(entries)}:[/yellow]")
+        for entry in entries[:REPORT_LIMIT]:
+            print(f"  {entry}")
+        if len(entries) > REPORT_LIMIT:
+            print(f"  ... and {len(entries) - REPORT_LIMIT} more")
+
+    if dry_run:
+        print(f"[bold]Dry run:[/bold] would import {len(added)} host(s), skip {len(duplicates)}, reject {len(invalid)}.")
+        return True
+
+    if not added:
+        print("[yellow]No new hosts to import.[/yellow]")
+        return True
+
+    # Single batched write for the whole import
+    if save_hosts(added, index.database):
+        ids = f"ID {min(added)}" if len(added) == 1 else f"IDs {min(added)}-{max(added)}"
+        print(f"[bold green]Imported {len(added)} host(s)[/bold green] ({ids}).")
+        return True
+    print("[bold red]Failed to save hosts![/bold red]")
+    return False
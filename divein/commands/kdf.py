@@ -0,0 +1,120 @@
+"""
+KDF command - Tune and migrate master password key derivation
+"""
+import math
+import time
+import typer
+from rich import print
+from .. import vault
+from ..config import get_setting, save_setting
+from ..crypto import KDF_ALGORITHMS, derive_key
+from ..database import load_database
+
+app = typer.Typer(help="Tune master password key derivation", no_args_is_help=True)
+
+# Never calibrate below these, however slow the machine
+MIN_PBKDF2_ITERATIONS = 100000
+MIN_SCRYPT_N = 2 ** 14
+MAX_SCRYPT_N = 2 ** 20 # 1 GiB of memory at r=8
+
+def describe(kdf):
+    """One-line description of KDF parameters"""
+    if kdf["algorithm"] == "scrypt":
+        return f"scrypt (N={kdf['n']}, r={kdf['r']}, p={kdf['p']})"
+    return f"{kdf['algorithm']} ({kdf['iterations']:,} iterations)"
+
+def time_kdf(kdf, runs=2):
+    """Fastest of runs derivations, in seconds"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        derive_key("calibration", kdf=kdf)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+@app.command(name="status")
+def kdf_status():
+    """Show configured and stored KDF parameters"""
+    print(f"Configured: [bold]{describe(vault.kdf_params())}[/bold]")
+    header = vault.load_header()
+    if header is None:
+        print("Vault:      [yellow]none yet[/yellow]")
+    else:
+        current = vault.vault_kdf(header)
+        note = "" if current == vault.kdf_params() else " [yellow](differs; migrates on next unlock)[/yellow]"
+        print(f"Vault:      [bold]{describe(current)}[/bold]{note}")
+
+    legacy = {}
+    for data in load_database().values():
+        if vault.is_legacy(data):
+            label = describe(vault.vault_kdf(data))
+            legacy[label] = legacy.get(label, 0) + 1
+    for label, count in sorted(legacy.items()):
+        print(f"Legacy hosts: [bold]{count}[/bold] with {label}")
+
+@app.command(name="calibrate")
+def kdf_calibrate(
+    target_ms: int = typer.Option(300, "--target-ms", "-t", min=1, help="Unlock time to aim for on this machine"),
+    algorithm: str = typer.Option(None, "--algorithm", "-a", help=f"One of {', '.join(KDF_ALGORITHMS)} (default: current setting)"),
+    dry_run: bool = typer.Option(False, "--dry-run", "-n", help="Only print the chosen parameters"),
+):
+    """Pick KDF parameters that take about --target-ms here"""
+    algorithm = algorithm or get_setting("kdf_algorithm")
+    if algorithm not in KDF_ALGORITHMS:
+        print(f"[bold red]Unknown algorithm '{algorithm}'. Use one of: {', '.join(KDF_ALGORITHMS)}[/bold red]")
+        return False
+    target = target_ms / 1000
+
+    print(f"Calibrating {algorithm} for ~{target_ms} ms...")
+    if algorithm == "scrypt":
+        # Cost is linear in N; N must be a power of two
+        r, p = get_setting("kdf_scrypt_r"), get_setting("kdf_scrypt_p")
+        elapsed = time_kdf({"algorithm": "scrypt", "n": MIN_SCRYPT_N, "r": r, "p": p})
+        n = 2 ** round(math.log2(MIN_SCRYPT_N * target / elapsed))
+        n = min(max(n, MIN_SCRYPT_N), MAX_SCRYPT_N)
+        kdf = {"algorithm": "scrypt", "n": n, "r": r, "p": p}
+    else:
+        probe = MIN_PBKDF2_ITERATIONS
+        elapsed = time_kdf({"algorithm": algorithm, "iterations": probe})
+        iterations = round(probe * target / elapsed, -4)
+        kdf = {"algorithm": algorithm, "iterations": int(max(iterations, MIN_PBKDF2_ITERATIONS))}
+
+    measured = time_kdf(kdf, runs=1) * 1000
+    print(f"Chose [bold]{describe(kdf)}[/bold]: {measured:.0f} ms per unlock")
+    if measured > target_ms * 2:
+        print("[yellow]This machine is slower than the minimum parameters allow for this target.[/yellow]")
+    if dry_run:
+        return True
+
+    save_setting("kdf_algorithm", algorithm)
+    if algorithm == "scrypt":
+        save_setting("kdf_scrypt_n", kdf["n"])
+    else:
+        save_setting("kdf_iterations", kdf["iterations"])
+    print("[green]Saved.[/green] The vault moves to these settings after its next unlock with the master password, or now with 'divein kdf migrate'.")
+    return True
+
+@app.command(name="migrate")
+def kdf_migrate():
+    """Rewrap the vault key with the configured KDF parameters now"""
+    header = vault.load_header()
+    if header is None:
+        print("[yellow]No vault yet.[/yellow] New vaults use the configured parameters.")
+        return False
+    if vault.vault_kdf(header) == vault.kdf_params():
+        print(f"[green]Vault already uses {describe(vault.kdf_params())}.[/green]")
+        return True
+
+    from ..crypto import unlock_vault
+    master_password = vault.get_master_password()
+    try:
+        kek = unlock_vault(header, master_password)
+    except ValueError:
+        print("[bold red]Failed to unlock vault! Wrong master password?[/bold red]")
+        return False
+    if vault.migrate_kdf(header, kek, master_password):
+        print(f"[bold green]Vault now uses {describe(vault.kdf_params())}.[/bold green]")
+        return True
+    print("[bold red]The vault changed while migrating; run the command again.[/bold red]")
+    return False
@@ -4,27 +4,81 @@ List command - Show all saved hosts with interactive connection
 import typer
 from rich import print
 from rich.table import Table
-from ..database import load_database
+from ..config import get_setting
+from ..database import load_database, load_index, list_ids, find_host
 from ..utils import connect_host
 from .delete import delete_host
 from .update import update_host
+from .. import trace
 
-def print_table():
-    """Helper to print the hosts table"""
-    database = load_database()
+class StatusCell:
+    """Table cell that renders the latest probe result for a host"""
+
+    def __init__(self, results, host_id):
+        self.results = results
+        self.host_id = host_id
+
+    def __rich__(self):
+        from ..probe import format_status
+        return format_status(self.results.get(self.host_id))
+
+SORT_ORDERS = ("id", "frecency", "recent")
+
+def print_table(probe=False, selector=None, sort="id"):
+    """
+    Helper to print the hosts table, optionally only the selected hosts.
+    sort is 'id', 'frecency' (most used recently first) or 'recent'.
+    """
+    if selector:
+        from ..selector import select, warn_unmatched
+        index = load_index()
+        selection = select(selector, index)
+        warn_unmatched(selection)
+        if not index.database:
+            database = {}
+        elif not selection:
+            print(f"[bold red]No matching hosts found for '{selector}'[/bold red]")
+            return False
+        else:
+            database = {host_id: index.get(host_id) for host_id in selection}
+    else:
+        database = load_database()
     
     if not database:
         print("[yellow]No hosts saved yet.[/yellow]")
         print("Use 'divein add' to add your first host.")
         return False
     
+    show_tags = any(data.get("tags") for data in database.values())
+    order = sorted(database.keys())
+    usage = None
+    if sort != "id":
+        from ..stats import load_stats, decayed
+        from ..probe import format_age
+        import time
+        usage = load_stats()
+        now = time.time()
+        if sort == "frecency":
+            key = lambda host_id: -decayed(usage[host_id], now) if host_id in usage else 0
+        else:
+            key = lambda host_id: -usage[host_id]["last"] if host_id in usage else 0
+        # Stable sort: unused hosts stay in ID order at the end
+        order.sort(key=key)
     table = Table(title="Saved Hosts")
     table.add_column("ID", style="cyan", no_wrap=True)
     table.add_column("Nickname", style="magenta")
     table.add_column("User@Host:Port", style="green")
+    if show_tags:
+        table.add_column("Tags", style="blue")
+    if usage is not None:
+        table.add_column("Used", justify="right")
+        table.add_column("Last", justify="right", style="dim")
+    if probe:
+        # Fixed width so the layout doesn't jump as results arrive
+        table.add_column("Status", no_wrap=True, width=12)
+        results = {}
     
-    # Sort by ID
-    for host_id in sorted(database.keys()):
+    for host_id in order:
         data = database[host_id]
         username = data["username"]
         host = data["host"]
@@ -32,24 +86,98 @@ def print_table():
         nickname = data.get("nickname", "")
         
         connection_str = f"{username}@{host}:{port}"
+        row = [str(host_id), nickname, connection_str]
+        if show_tags:
+            row.append(" ".join(f"@{tag}" for tag in data.get("tags") or ()))
+        if usage is not None:
+            entry = usage.get(host_id)
+            row.extend([str(entry["count"]), format_age(now - entry["last"])] if entry else ["", ""])
         
-        table.add_row(str(host_id), nickname, connection_str)
+        if probe:
+            row.append(StatusCell(results, host_id))
+        table.add_row(*row)
     
-    print(table)
+    if probe:
+        print_probed_table(table, database, results)
+    else:
+        print(table)
     return True
 
-def list_hosts():
+def print_probed_table(table, database, results):
+    """Show the table at once and fill in the status column as probes finish"""
+    import threading
+    from rich.live import Live
+    from ..probe import run_probes
+    
+    worker = threading.Thread(target=run_probes, kwargs={
+        "targets": database,
+        "concurrency": get_setting("probe_concurrency"),
+        "timeout": get_setting("probe_timeout"),
+        "on_result": results.__setitem__,
+    }, daemon=True)
+    
+    with Live(table, refresh_per_second=8) as live:
+        worker.start()
+        worker.join()
+        live.refresh()
+
+PROMPT = "\nConnect (ID/Nickname), Delete ('rm <ID>'), Update ('u'), or 'q' to exit: "
+
+def show_matches(search, query):
+    """Draw the best fuzzy matches as a dim hint on the line below the prompt"""
+    import shutil
+    import sys
+    
+    hint = ""
+    if query and " " not in query:
+        top = search.top(query)
+        if top:
+            labels = [f"{host_id} {search.database[host_id].get('nickname') or search.database[host_id].get('host', '')}" for host_id in top]
+            hint = "Matches: " + ", ".join(labels)
+        else:
+            hint = "No matches"
+    hint = hint[:shutil.get_terminal_size().columns - 1]
+    # Save cursor, move down, clear the line, draw, restore
+    sys.stdout.write(f"\x1b7\x1b[B\r\x1b[K\x1b[2m{hint}\x1b[0m\x1b8")
+    sys.stdout.flush()
+
+def list_hosts(
+    selector: str = typer.Argument(None, help="Only list these hosts, e.g. '@prod&@web' or 'db-*'"),
+    probe: bool = typer.Option(False, "--probe", help="Add a live reachability/latency column"),
+    sort: str = typer.Option("id", "--sort", "-s", help="Row order: id, frecency (most used lately) or recent"),
+    browse: bool = typer.Option(None, "--browse/--table", help="Full-screen browser (default: automatic for large inventories)"),
+):
     """List all saved hosts with interactive connection"""
     import click
     import sys
     
+    if sort not in SORT_ORDERS:
+        print(f"[bold red]Unknown sort order '{sort}'. Use one of: {', '.join(SORT_ORDERS)}[/bold red]")
+        return
+    if browse is None and not probe and not selector and sort == "id" and sys.stdout.isatty():
+        threshold = get_setting("browser_threshold")
+        browse = bool(threshold) and len(list_ids()) > threshold
+    if browse:
+        from ..browser import browse_hosts
+        browse_hosts()
+        return
+    
+    from ..search import FuzzySearch
+    
     # Interactive connection loop
+    search = None
     while True:
-        has_hosts = print_table()
+        with trace.span("print table"):
+            has_hosts = print_table(probe=probe, selector=selector, sort=sort)
         if not has_hosts:
             break
+        # Fuzzy index is built once and only rebuilt after edits
+        if search is None:
+            with trace.span("build search index"):
+                search = FuzzySearch(load_database())
             
-        sys.stdout.write("\nConnect (ID/Nickname), Delete ('rm <ID>'), Update ('u'), or 'q' to exit: ")
+        # Reserve a line under the prompt for match hints
+        sys.stdout.write("\n\n\x1b[A" + PROMPT.lstrip("\n"))
         sys.stdout.flush()
         
         cmd_buffer = []
@@ -64,6 +192,7 @@ def list_hosts():
                 target = typer.prompt("Enter Host ID or Nickname to update")
                 if update_host(target):
                     print("\n")
+                    search = None
                     # Refresh table
                     break
                 else:
@@ -79,6 +208,7 @@ def list_hosts():
                 
             # Handle Enter
             if char == '\r' or char == '\n':
+                show_matches(search, "")
                 print("\n")
                 break
             
@@ -87,12 +217,12 @@ def list_hosts():
                 if cmd_buffer:
                     cmd_buffer.pop()
                     sys.stdout.write('\b \b')
-                    sys.stdout.flush()
+                    show_matches(search, "".join(cmd_buffer))
             # Handle printable
             elif char.isprintable():
                 cmd_buffer.append(char)
                 sys.stdout.write(char)
-                sys.stdout.flush()
+                show_matches(search, "".join(cmd_buffer))
         
         if should_break:
             break
@@ -112,16 +242,26 @@ def list_hosts():
         try:
             # Handle Deletion
             if choice.startswith("rm ") or choice.startswith("delete ") or choice.startswith("del "):
-                try:
-                    target = choice.split(" ", 1)[1]
-                    if delete_host(target):
-                        # Refresh table by looping again
-                        print("\n")
-                        continue
-                except IndexError:
+                target = choice.split(" ", 1)[1].strip()
+                if not target:
                     print("[red]Please specify an ID to delete (e.g., 'rm 1')[/red]")
-                    continue
+                elif delete_host(target):
+                    # Refresh table by looping again
+                    print("\n")
+                    search = None
+                # Never fall through to connecting, whatever the outcome
+                continue
 
+            # Offer the best fuzzy match, but never connect to it unasked
+            if find_host(choice)[0] is None:
+                top = search.top(choice, limit=1)
+                if top:
+                    data = search.database[top[0]]
+                    label = f"{data.get('nickname')}: " if data.get("nickname") else ""
+                    if not typer.confirm(f"Connect to {top[0]} ({label}{data['username']}@{data['host']})?", default=True):
+                        continue
+                    choice = str(top[0])
+            
             # Try to connect
             if connect_host(choice):
                 break
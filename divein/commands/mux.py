@@ -0,0 +1,61 @@
+"""
+Mux command - Inspect and stop multiplexed SSH masters
+"""
+import typer
+from rich import print
+from rich.table import Table
+from .. import mux
+from ..database import load_database, load_index
+from ..selector import select, warn_unmatched
+
+app = typer.Typer(help="Manage shared SSH connections (ControlMaster)", no_args_is_help=True)
+
+def _hosts_by_key():
+    """Map control socket names back to host IDs"""
+    hosts = {}
+    for host_id, data in load_database().items():
+        hosts.setdefault(mux.host_key(data), []).append((host_id, data))
+    return hosts
+
+@app.command(name="status")
+def mux_status():
+    """List live masters"""
+    hosts = _hosts_by_key()
+    table = Table(title="Shared Connections")
+    table.add_column("ID", style="cyan", no_wrap=True)
+    table.add_column("Nickname", style="magenta")
+    table.add_column("User@Host:Port", style="green")
+    table.add_column("PID")
+    
+    count = 0
+    for key, _, pid in mux.masters():
+        count += 1
+        for host_id, data in hosts.get(key, [(None, None)]):
+            if data is None:
+                table.add_row("-", "[dim]unknown[/dim]", f"[dim]{key}[/dim]", pid or "")
+            else:
+                table.add_row(str(host_id), data.get("nickname", ""),
+                              f"{data['username']}@{data['host']}:{data['port']}", pid or "")
+    
+    if not count:
+        print("[yellow]No shared connections running.[/yellow]")
+        return
+    print(table)
+
+@app.command(name="stop")
+def mux_stop(selector: str = typer.Argument(None, help="IDs, ranges, nicknames or globs (default: all)")):
+    """Close live masters"""
+    if selector:
+        index = load_index()
+        selection = select(selector, index)
+        warn_unmatched(selection)
+        keys = {mux.host_key(index.get(host_id)) for host_id in selection}
+    else:
+        keys = None
+    
+    stopped = 0
+    for key, path, _ in mux.masters():
+        if keys is None or key in keys:
+            if mux.stop(path):
+                stopped += 1
+    print(f"[green]Stopped {stopped} shared connection(s).[/green]")
@@ -0,0 +1,48 @@
+"""
+Ping command - Check which hosts are reachable
+"""
+import typer
+from rich import print
+from ..config import get_setting
+from ..database import load_index
+from ..probe import run_probes, format_status
+from ..selector import select, warn_unmatched
+
+def ping_hosts(
+    selector: str = typer.Argument(None, help="IDs, ranges, nicknames or globs (default: all hosts)"),
+    timeout: float = typer.Option(None, "--timeout", "-t", help="Seconds to wait per host"),
+):
+    """Probe the SSH port of every selected host at once"""
+    index = load_index()
+    database = index.database
+    
+    if not database:
+        print("[yellow]No hosts saved yet.[/yellow]")
+        return
+    
+    if selector:
+        selection = select(selector, index)
+        warn_unmatched(selection)
+        target_ids = selection.ids
+    else:
+        target_ids = database.keys()
+    targets = {host_id: database[host_id] for host_id in target_ids}
+    if not targets:
+        print(f"[bold red]No matching hosts found for '{selector}'[/bold red]")
+        raise typer.Exit(1)
+    
+    def on_result(host_id, result):
+        data = database[host_id]
+        name = data.get("nickname") or f"{data['username']}@{data['host']}"
+        detail = f" [dim]{result['banner']}[/dim]" if result["banner"] else ""
+        print(f"  [bold]{host_id}[/bold] {name}: {format_status(result)}{detail}")
+    
+    results = run_probes(
+        targets,
+        concurrency=get_setting("probe_concurrency"),
+        timeout=timeout or get_setting("probe_timeout"),
+        on_result=on_result,
+    )
+    
+    up = sum(1 for r in results.values() if r["status"] == "up")
+    print(f"\n[bold]{up}/{len(results)} host(s) up[/bold]")
@@ -0,0 +1,22 @@
+"""
+Prewarm command - Open shared connections to the most used hosts
+"""
+import typer
+from rich import print
+from ..config import get_setting
+from ..database import get_host
+
+def prewarm_hosts(top: int = typer.Option(None, "--top", "-n", help="How many hosts (default: the prewarm setting, else 5)")):
+    """Open masters (or resolve DNS) for the hosts used most lately"""
+    from ..prewarm import prewarm
+    limit = top or get_setting("prewarm") or 5
+    results = prewarm(limit)
+    if not results:
+        print("[yellow]No connection history yet.[/yellow] Hosts are ranked by how often and how recently you connect.")
+        return
+    for host_id, action, ok in results:
+        data = get_host(host_id)
+        name = data.get("nickname") or f"{data['username']}@{data['host']}"
+        what = "shared connection" if action == "master" else "DNS resolved"
+        status = "[green]ok[/green]" if ok else "[red]failed[/red]"
+        print(f"  [bold]{host_id}[/bold] {name}: {what} {status}")
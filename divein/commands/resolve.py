@@ -0,0 +1,70 @@
+"""
+Resolve command - Look up and cache the addresses of saved hosts
+"""
+import time
+import typer
+from rich import print
+from ..config import get_setting
+from ..database import iter_hosts
+from ..selector import select, warn_unmatched
+from .. import resolver
+
+def resolve_hosts(
+    selector: str = typer.Argument(None, help="IDs, ranges, nicknames, globs or tags (default: all hosts)"),
+    timeout: float = typer.Option(None, "--timeout", "-t", help="Seconds to wait per name"),
+    show: bool = typer.Option(False, "--show", help="Print the cache instead of resolving"),
+):
+    """Resolve every saved host name at once and cache the addresses"""
+    if show:
+        now = time.time()
+        rows = resolver.entries()
+        if not rows:
+            print("[yellow]The DNS cache is empty.[/yellow] Run 'divein resolve' to fill it.")
+        for name, addresses, _, expires in rows:
+            left = f"[green]{int(expires - now)}s left[/green]" if expires > now else "[dim]expired[/dim]"
+            print(f"  [bold]{name}[/bold] {' '.join(addresses)} {left}")
+        return
+
+    if selector:
+        from ..database import get_host
+        selection = select(selector)
+        warn_unmatched(selection)
+        hosts = ((host_id, get_host(host_id)) for host_id in selection)
+    else:
+        hosts = iter_hosts()
+
+    # One lookup per distinct name; names ~/.ssh/config redirects are left to ssh
+    aliases = resolver.ssh_aliases()
+    names = {}
+    skipped = 0
+    for _, data in hosts:
+        name = data["host"]
+        if resolver.is_address(name) or data.get("jump"):
+            continue
+        if name in aliases:
+            skipped += 1
+            continue
+        names.setdefault(name, int(data.get("port", 22)))
+    if not names:
+        print("[yellow]No host names to resolve.[/yellow]")
+        return
+
+    failed = []
+    def on_result(name, addresses, ttl, error):
+        if not addresses:
+            failed.append(f"{name} ({error or 'no addresses'})")
+
+    start = time.perf_counter()
+    resolver.resolve_names(
+        names,
+        concurrency=get_setting("probe_concurrency"),
+        timeout=timeout or get_setting("resolve_timeout"),
+        ttl=get_setting("dns_ttl"),
+        on_result=on_result,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"[bold green]Resolved {len(names) - len(failed)}/{len(names)} name(s)[/bold green] in {elapsed:.1f}s")
+    if skipped:
+        print(f"[dim]Skipped {skipped} name(s) that ~/.ssh/config maps elsewhere.[/dim]")
+    for entry in failed:
+        print(f"  [red]{entry}[/red]")
@@ -5,44 +5,40 @@ from rich import print
 from rich.panel import Panel
 from rich.text import Text
 from rich.console import Group
-from ..database import load_database, get_database_path
+from ..database import load_database, get_host, find_host, get_database_path
+from ..selector import is_single, select, warn_unmatched
 
 import typer
 
-def show_hosts(identifier: str = typer.Argument(None, help="Host ID or Nickname")):
-    """Show detailed information about all hosts or a specific host"""
-    database = load_database()
-    
+def show_hosts(identifier: str = typer.Argument(None, help="Host ID, nickname or selector, e.g. '1-5,db-*' or '@prod&@web'")):
+    """Show detailed information about all hosts or selected hosts"""
     print(f"[dim]Database: {get_database_path()}[/dim]")
     
+    if identifier and is_single(identifier):
+        # One ID or nickname: indexed lookup, no full load
+        host_id, data = find_host(identifier, connection=False)
+        if host_id is None:
+            print(f"[bold red]Host '{identifier}' not found![/bold red]")
+            return
+        database = {host_id: data}
+    elif identifier:
+        selection = select(identifier)
+        warn_unmatched(selection)
+        if not selection:
+            print(f"[bold red]No matching hosts found for '{identifier}'[/bold red]")
+            return
+        database = {host_id: get_host(host_id) for host_id in selection}
+    else:
+        database = load_database()
+    
     if not database:
         print("[yellow]No hosts saved yet.[/yellow]")
         print("Use 'divein add' to add your first host.")
         return
     
-    target_ids = []
-    
-    if identifier:
-         # Find specific host
-         found = False
-         # Try ID
-         if identifier.isdigit() and int(identifier) in database:
-             target_ids.append(int(identifier))
-             found = True
-         else:
-             # Try nickname
-             for hid, data in database.items():
-                 if data.get("nickname") == identifier:
-                     target_ids.append(hid)
-                     found = True
-                     break
-         
-         if not found:
-             print(f"[bold red]Host '{identifier}' not found![/bold red]")
-             return
-    else:
-        # Show all
-        target_ids = sorted(database.keys())
+    target_ids = sorted(database.keys())
+    from ..stats import load_stats, describe
+    usage = load_stats()
 
     # Display loop
     for host_id in target_ids:
@@ -74,6 +70,13 @@ def show_hosts(identifier: str = typer.Argument(None, help="Host ID or Nickname"
         
         if handshake:
              content_lines.append(f"[bold]Handshake:[/bold] {handshake}")
+        if data.get("jump"):
+             from ..jump import describe as describe_jump
+             content_lines.append(f"[bold]Via:[/bold] {describe_jump(data)}")
+        if data.get("tags"):
+             content_lines.append(f"[bold]Tags:[/bold] {' '.join('@' + tag for tag in data['tags'])}")
+        if host_id in usage:
+             content_lines.append(f"[bold]Used:[/bold] {describe(usage[host_id])}")
              
         content_lines.append(f"\n[dim]Connect with:[/dim] [cyan]divein {host_id}[/cyan]")
 
@@ -0,0 +1,20 @@
+"""
+Tags command - List host tags and how many hosts carry each
+"""
+from rich import print
+from rich.table import Table
+from ..database import load_index
+
+def list_tags():
+    """List every tag with its host count"""
+    tags = load_index().tags()
+    if not tags:
+        print("[yellow]No tags yet.[/yellow] Add them with 'divein update <host>'.")
+        return
+    table = Table(title="Tags")
+    table.add_column("Tag", style="blue")
+    table.add_column("Hosts", justify="right", style="cyan")
+    for tag, count in sorted(tags.items()):
+        table.add_row(f"@{tag}", str(count))
+    print(table)
+    print("[dim]Select tagged hosts with e.g. 'divein list @prod&@web'[/dim]")
@@ -3,33 +3,43 @@ Update command - Edit existing SSH hosts
 """
 import typer
 from rich import print
-from ..database import load_database, save_database
-from ..crypto import encrypt_password
+from ..database import find_host, load_index, save_host, check_nickname, parse_tags, DuplicateNicknameError
+from ..selector import is_single, select, warn_unmatched
+from ..jump import parse_jump, JumpError
+from ..vault import encrypt_host_password
 
 def update_host(identifier: str):
-    """Update an existing host interactively"""
-    database = load_database()
-    
-    # helper to find host id
-    host_id = None
-    if identifier.isdigit() and int(identifier) in database:
-        host_id = int(identifier)
-    else:
-        for hid, data in database.items():
-            if data.get("nickname") == identifier:
-                host_id = hid
-                break
-    
-    if not host_id:
-        print(f"[bold red]Host '{identifier}' not found![/bold red]")
+    """Update existing hosts interactively, one after another"""
+    if is_single(identifier):
+        host_id, current_data = find_host(identifier, connection=False)
+        if not host_id:
+            print(f"[bold red]Host '{identifier}' not found![/bold red]")
+            return False
+        return edit_host(host_id, current_data)
+
+    index = load_index()
+    selection = select(identifier, index)
+    warn_unmatched(selection)
+    if not selection:
+        print(f"[bold red]No matching hosts found for '{identifier}'[/bold red]")
         return False
-    
-    current_data = database[host_id]
+    updated = True
+    for host_id in selection:
+        updated = edit_host(host_id, index.get(host_id)) and updated
+    return updated
+
+def edit_host(host_id, current_data):
+    """Prompt for new values for one host and save them"""
     print(f"\n[bold green]Updating Host {host_id}[/bold green] (Press Enter to keep current value)")
     print("=" * 50)
     
     # Update fields with defaults
     new_nickname = typer.prompt("Nickname", default=current_data.get("nickname", ""))
+    try:
+        check_nickname(new_nickname, host_id)
+    except DuplicateNicknameError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
     new_username = typer.prompt("Username", default=current_data.get("username", ""))
     new_host = typer.prompt("Host/IP", default=current_data.get("host", ""))
     new_port = typer.prompt("Port", default=current_data.get("port", 22), type=int)
@@ -41,6 +51,7 @@ def update_host(identifier: str):
     new_password = ""
     new_encrypted_data = current_data.get("encrypted_password")
     new_encryption_salt = current_data.get("encryption_salt")
+    new_data_key = current_data.get("data_key")
     
     if new_ssh_key:
         print("[yellow]Using SSH key authentication[/yellow]")
@@ -48,6 +59,7 @@ def update_host(identifier: str):
         if new_ssh_key != current_ssh_key:
              new_encrypted_data = None
              new_encryption_salt = None
+             new_data_key = None
     else:
         # Password auth
         # We only prompt for password if they want to CHANGE it or if it was empty/key-based before
@@ -59,16 +71,31 @@ def update_host(identifier: str):
         if pass_input:
              # User entered a new password
              print("[yellow]Encrypting new password...[/yellow]")
-             master_password = typer.prompt("Enter Master Password for encryption", hide_input=True)
-             crypto_result = encrypt_password(pass_input, master_password)
-             new_encrypted_data = crypto_result["encrypted_data"]
-             new_encryption_salt = crypto_result["salt"]
+             try:
+                 encrypted_fields = encrypt_host_password(pass_input)
+             except ValueError:
+                 print("[bold red]Failed to unlock vault! Wrong master password?[/bold red]")
+                 return False
+             new_encrypted_data = encrypted_fields["encrypted_password"]
+             new_encryption_salt = None
+             new_data_key = encrypted_fields["data_key"]
              print("[bold green]Password updated and encrypted![/bold green]")
         elif not has_existing_pass:
              # No existing pass and no new pass?
              print("[red]Warning: No password or SSH key provided.[/red]")
     
     new_handshake = typer.prompt("Handshake method", default=current_data.get("handshake", ""))
+    jump_input = typer.prompt("Jump host (ID or nickname, '-' for none)", default=str(current_data.get("jump") or "-"))
+    try:
+        new_jump = parse_jump("" if jump_input.strip() == "-" else jump_input, host_id)
+    except JumpError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
+    try:
+        new_tags = parse_tags(typer.prompt("Tags", default=", ".join(current_data.get("tags") or [])))
+    except ValueError as e:
+        print(f"[bold red]{e}[/bold red]")
+        return False
     
     # Construct update
     updated_host = {
@@ -79,13 +106,14 @@ def update_host(identifier: str):
         "password": "", # Always empty
         "encrypted_password": new_encrypted_data,
         "encryption_salt": new_encryption_salt,
+        "data_key": new_data_key,
         "ssh_key": new_ssh_key,
-        "handshake": new_handshake
+        "handshake": new_handshake,
+        "jump": new_jump,
+        "tags": new_tags
     }
     
-    database[host_id] = updated_host
-    
-    if save_database(database):
+    if save_host(host_id, updated_host):
         print(f"[bold green]Host '{new_nickname or host_id}' updated successfully![/bold green]")
         return True
     else:
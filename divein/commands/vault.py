@@ -0,0 +1,70 @@
+"""
+Vault command - Inspect and migrate password encryption
+"""
+import typer
+from rich import print
+from .. import vault
+from ..database import load_database
+
+app = typer.Typer(help="Manage the master-password vault", no_args_is_help=True)
+
+@app.command(name="status")
+def vault_status():
+    """Show how many hosts use the vault or the old per-host format"""
+    database = load_database()
+    in_vault = sum(1 for data in database.values() if data.get("data_key"))
+    legacy = sum(1 for data in database.values() if vault.is_legacy(data))
+    
+    if vault.load_header() is None:
+        print("[yellow]No vault yet.[/yellow] It is created with the first encrypted password.")
+    else:
+        print(f"Vault: {vault.VAULT_FILE}")
+    print(f"  Vault-encrypted hosts: [bold]{in_vault}[/bold]")
+    print(f"  Legacy per-host salt:  [bold]{legacy}[/bold]")
+
+@app.command(name="migrate")
+def vault_migrate():
+    """Re-encrypt every legacy host into the vault"""
+    database = load_database()
+    if not any(vault.is_legacy(data) for data in database.values()):
+        print("[green]All encrypted hosts already use the vault.[/green]")
+        return
+    
+    migrated, failed = vault.migrate_all(database)
+    if migrated:
+        print(f"[bold green]Migrated {migrated} host(s) into the vault.[/bold green]")
+    if failed:
+        print(f"[bold red]{failed} host(s) could not be decrypted with this master password.[/bold red]")
+
+@app.command(name="rekey")
+def vault_rekey(
+    workers: int = typer.Option(None, "--workers", "-w", help="Processes for legacy hosts (default: one per CPU)"),
+):
+    """Change the master password, moving legacy hosts into the vault first"""
+    from rich.progress import Progress
+    
+    database = load_database()
+    if vault.load_header() is None and not any(vault.is_legacy(data) for data in database.values()):
+        print("[yellow]No vault or encrypted hosts yet; nothing to rekey.[/yellow]")
+        return False
+    
+    old_password = typer.prompt("Current Master Password", hide_input=True, err=True)
+    new_password = typer.prompt("New Master Password", hide_input=True, confirmation_prompt=True, err=True)
+    
+    with Progress(transient=True) as bar:
+        task = bar.add_task("Re-encrypting", total=None)
+        def progress(done, total):
+            bar.update(task, completed=done, total=total)
+        try:
+            rekeyed, failed = vault.rekey(old_password, new_password, database, workers=workers, progress=progress)
+        except ValueError as e:
+            print(f"[bold red]{e}[/bold red]")
+            return False
+        except OSError as e:
+            print(f"[bold red]{e}. Nothing was switched; run 'divein rekey' again.[/bold red]")
+            return False
+    
+    print(f"[bold green]Master password changed.[/bold green] {rekeyed} host(s) now open with the new password.")
+    if failed:
+        print(f"[bold red]{failed} host(s) could not be decrypted with the current master password and were left unchanged.[/bold red]")
+    return True
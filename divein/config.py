@@ -0,0 +1,90 @@
+"""
+User configuration for DiveIn
+
+Settings are read from ~/.divein/config.json and can be overridden with
+DIVEIN_<NAME> environment variables.
+"""
+import json
+import os
+from .database import DB_DIR
+
+CONFIG_FILE = DB_DIR / "config.json"
+
+DEFAULTS = {
+    # Storage backend: "json", "journal" or "sqlite"
+    "backend": "json",
+    # "stable": deleted IDs are retired and never reused; renumber with
+    # 'divein renumber'. "compact": renumber 1..n after every delete
+    "id_mode": "stable",
+    # Journal backend: compact once the journal reaches either limit
+    "journal_max_ops": 1000,
+    "journal_max_bytes": 1024 * 1024,
+    # Seconds the agent keeps an unlocked key
+    "agent_ttl": 900,
+    # Reuse one authenticated ssh connection per host (ControlMaster)
+    "mux": True,
+    "mux_persist": "10m",
+    # 'divein list' opens the full-screen browser above this many hosts (0: never)
+    "browser_threshold": 1000,
+    # Record per-host use and connect latency (for list --sort frecency)
+    "stats": True,
+    # After each connect, pre-warm this many of the most used hosts in
+    # the background (0: off)
+    "prewarm": 0,
+    # Connect to addresses cached by 'divein resolve'. Entries live for
+    # their DNS TTL with dnspython installed, else for dns_ttl seconds
+    "dns_cache": True,
+    "dns_ttl": 300,
+    "resolve_timeout": 5.0,
+    # Reachability probes (divein ping, list --probe)
+    "probe_concurrency": 256,
+    "probe_timeout": 3.0,
+    # Key derivation for the master password ("pbkdf2-sha256" or "scrypt");
+    # see 'divein kdf calibrate'
+    "kdf_algorithm": "pbkdf2-sha256",
+    "kdf_iterations": 480000,
+    "kdf_scrypt_n": 32768,
+    "kdf_scrypt_r": 8,
+    "kdf_scrypt_p": 1,
+    # Move the vault to changed KDF settings after the next password unlock
+    "kdf_auto_migrate": True,
+}
+
+_config = None
+
+def load_config():
+    """Load config.json merged over the defaults"""
+    global _config
+    if _config is None:
+        _config = dict(DEFAULTS)
+        if CONFIG_FILE.exists():
+            try:
+                with open(CONFIG_FILE, 'r') as f:
+                    _config.update(json.load(f))
+            except Exception as e:
+                print(f"Error loading config: {e}")
+    return _config
+
+def get_setting(name):
+    """Return a setting, preferring the DIVEIN_<NAME> environment variable"""
+    env = os.environ.get(f"DIVEIN_{name.upper()}")
+    if env is not None:
+        default = DEFAULTS.get(name)
+        if isinstance(default, bool):
+            return env.lower() in ("1", "true", "yes", "on")
+        if isinstance(default, (int, float)):
+            return type(default)(env)
+        return env
+    return load_config().get(name, DEFAULTS.get(name))
+
+def save_setting(name, value):
+    """Persist a single setting to config.json"""
+    config = dict(load_config())
+    config[name] = value
+    stored = {k: v for k, v in config.items() if DEFAULTS.get(k) != v}
+    DB_DIR.mkdir(exist_ok=True)
+    tmp = CONFIG_FILE.with_suffix(".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(stored, f, indent=2)
+    os.replace(tmp, CONFIG_FILE)
+    load_config()[name] = value
@@ -1,27 +1,49 @@
 """
-Encryption utilities for DiveIn using PBKDF2 and Fernet (AES).
+Encryption utilities for DiveIn using PBKDF2 or scrypt and Fernet (AES).
 """
 import base64
 import os
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from . import trace
 
-def derive_key(master_password: str, salt: bytes = None) -> tuple[bytes, bytes]:
+# cryptography is imported inside the functions that need it; loading it
+# costs more than a key-auth connect does in total.
+
+def _fernet(key: bytes):
+    from cryptography.fernet import Fernet
+    return Fernet(key)
+
+# KDF parameters used by everything written before they became
+# configurable; records and vaults without a "kdf" field use these.
+DEFAULT_KDF = {"algorithm": "pbkdf2-sha256", "iterations": 480000}
+
+KDF_ALGORITHMS = ("pbkdf2-sha256", "scrypt")
+
+@trace.timed("derive_key")
+def derive_key(master_password: str, salt: bytes = None, kdf: dict = None) -> tuple[bytes, bytes]:
     """
     Derive a Fernet-compatible key from the master password.
+    kdf holds the algorithm and its cost parameters (default: DEFAULT_KDF).
     Returns the key and the salt used.
     """
     if salt is None:
         salt = os.urandom(16)
-        
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=480000,
-    )
-    key = base64.urlsafe_b64encode(kdf.derive(master_password.encode()))
+    kdf = kdf or DEFAULT_KDF
+    
+    if kdf["algorithm"] == "pbkdf2-sha256":
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        kdf_impl = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=kdf["iterations"],
+        )
+    elif kdf["algorithm"] == "scrypt":
+        from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+        kdf_impl = Scrypt(salt=salt, length=32, n=kdf["n"], r=kdf["r"], p=kdf["p"])
+    else:
+        raise ValueError(f"Unknown KDF algorithm '{kdf['algorithm']}'")
+    key = base64.urlsafe_b64encode(kdf_impl.derive(master_password.encode()))
     return key, salt
 
 def encrypt_password(password: str, master_password: str) -> dict:
@@ -33,7 +55,7 @@ def encrypt_password(password: str, master_password: str) -> dict:
         return {"input_type": "none"}
         
     key, salt = derive_key(master_password)
-    f = Fernet(key)
+    f = _fernet(key)
     token = f.encrypt(password.encode())
     
     return {
@@ -42,14 +64,112 @@ def encrypt_password(password: str, master_password: str) -> dict:
         "input_type": "encrypted_password"
     }
 
-def decrypt_password(encrypted_data: str, salt_hex: str, master_password: str) -> str:
+def decrypt_password(encrypted_data: str, salt_hex: str, master_password: str, kdf: dict = None) -> str:
     """
     Decrypt the password using the master password.
     """
     try:
         salt = bytes.fromhex(salt_hex)
-        key, _ = derive_key(master_password, salt)
-        f = Fernet(key)
+        key, _ = derive_key(master_password, salt, kdf)
+    except Exception:
+        raise ValueError("Invalid Master Password or corrupted data")
+    return decrypt_with_key(encrypted_data, key)
+
+def decrypt_with_key(encrypted_data: str, key: bytes) -> str:
+    """
+    Decrypt the password with an already derived key.
+    """
+    try:
+        f = _fernet(key)
         return f.decrypt(encrypted_data.encode()).decode()
     except Exception:
         raise ValueError("Invalid Master Password or corrupted data")
+
+
+# Vault format: a random key-encryption key (KEK) wraps a random Fernet
+# data key per host, so unlocking any number of hosts costs a single KDF
+# run. The KEK itself is wrapped by a key derived from the master password
+# with the KDF parameters stored in the header, so moving to new
+# parameters rewraps one key instead of every host. Version 1 headers
+# used the derived key directly as the KEK.
+
+VAULT_CHECK = b"divein-vault"
+
+def create_vault(master_password: str, kdf: dict = None) -> tuple[dict, bytes]:
+    """
+    Create a new vault header for the master password.
+    Returns the header (safe to store) and the KEK.
+    """
+    kek = base64.urlsafe_b64encode(os.urandom(32))
+    header = {
+        "version": 2,
+        # Stable across KDF changes; names the KEK for the agent
+        "id": os.urandom(8).hex(),
+        "check": _fernet(kek).encrypt(VAULT_CHECK).decode(),
+    }
+    return wrap_vault_key(header, kek, master_password, kdf), kek
+
+def wrap_vault_key(header: dict, kek: bytes, master_password: str, kdf: dict = None) -> dict:
+    """
+    Return a copy of header with kek wrapped under master_password using
+    kdf (default: DEFAULT_KDF) and a fresh salt. Host records are unaffected.
+    """
+    kdf = dict(kdf or DEFAULT_KDF)
+    wrapping_key, salt = derive_key(master_password, kdf=kdf)
+    header = dict(header, id=vault_id(header))
+    header.update(version=2, salt=salt.hex(), kdf=kdf)
+    header["wrapped_kek"] = _fernet(wrapping_key).encrypt(kek).decode()
+    return header
+
+def vault_id(header: dict) -> str:
+    """Identifier of a vault's KEK; the salt for version 1 headers"""
+    return header.get("id") or header["salt"]
+
+def unlock_vault(header: dict, master_password: str) -> bytes:
+    """
+    Derive the key for a vault header, unwrap the KEK and verify it.
+    """
+    key, _ = derive_key(master_password, bytes.fromhex(header["salt"]), header.get("kdf"))
+    if header.get("wrapped_kek"):
+        try:
+            kek = _fernet(key).decrypt(header["wrapped_kek"].encode())
+        except Exception:
+            raise ValueError("Invalid Master Password or corrupted data")
+    else:
+        kek = key
+    check_vault_key(header, kek)
+    return kek
+
+def check_vault_key(header: dict, kek: bytes):
+    """
+    Raise ValueError unless kek unlocks the vault header.
+    """
+    try:
+        if _fernet(kek).decrypt(header["check"].encode()) == VAULT_CHECK:
+            return
+    except Exception:
+        pass
+    raise ValueError("Invalid Master Password or corrupted data")
+
+def encrypt_with_vault(password: str, kek: bytes) -> dict:
+    """
+    Encrypt a password under a fresh data key wrapped by the KEK.
+    """
+    if not password:
+        return {"input_type": "none"}
+    data_key = base64.urlsafe_b64encode(os.urandom(32))
+    return {
+        "encrypted_data": _fernet(data_key).encrypt(password.encode()).decode(),
+        "data_key": _fernet(kek).encrypt(data_key).decode(),
+        "input_type": "vault"
+    }
+
+def decrypt_with_vault(encrypted_data: str, wrapped_key: str, kek: bytes) -> str:
+    """
+    Unwrap a host's data key with the KEK and decrypt its password.
+    """
+    try:
+        data_key = _fernet(kek).decrypt(wrapped_key.encode())
+        return _fernet(data_key).decrypt(encrypted_data.encode()).decode()
+    except Exception:
+        raise ValueError("Invalid Master Password or corrupted data")
@@ -1,50 +1,387 @@
 """
 Database operations for storing hosts
 """
-import json
-import os
+import bisect
+import re
 from pathlib import Path
+from . import trace
 
 # Database location
 DB_DIR = Path.home() / ".divein"
 DB_FILE = DB_DIR / "database.json"
 
+DB_SQLITE_FILE = DB_DIR / "database.db"
+
+# Tags can't contain selector syntax (, & ! @ and globs) or whitespace
+TAG_PATTERN = re.compile(r"^[\w.:/+=-]+$")
+
+_storage = None
+
 def ensure_db_dir():
     """Create database directory if it doesn't exist"""
     DB_DIR.mkdir(exist_ok=True)
 
+def get_storage():
+    """Return the configured storage backend (created once per process)"""
+    global _storage
+    if _storage is None:
+        from .config import get_setting
+        from .storage import JsonStorage, JournalStorage, SqliteStorage
+        ensure_db_dir()
+        backend = get_setting("backend")
+        if backend == "sqlite":
+            _storage = SqliteStorage(DB_SQLITE_FILE, legacy_json=DB_FILE)
+        elif backend == "journal":
+            _storage = JournalStorage(
+                DB_FILE,
+                max_ops=get_setting("journal_max_ops"),
+                max_bytes=get_setting("journal_max_bytes"),
+            )
+        else:
+            _storage = JsonStorage(DB_FILE)
+    return _storage
+
+@trace.timed("load_database")
 def load_database():
-    """Load hosts from JSON database file"""
-    ensure_db_dir()
-    
-    if DB_FILE.exists():
-        try:
-            with open(DB_FILE, 'r') as f:
-                data = json.load(f)
-                # Convert keys to integers for proper sorting
-                return {int(k): v for k, v in data.items()}
-        except Exception as e:
-            print(f"Error loading database: {e}")
-            return {}
-    return {}
+    """Load all hosts as an {id: record} dict"""
+    try:
+        return get_storage().load()
+    except Exception as e:
+        print(f"Error loading database: {e}")
+        return {}
 
+@trace.timed("save_database")
 def save_database(data):
-    """Save hosts to JSON database file"""
+    """Replace the whole database with data"""
     try:
-        ensure_db_dir()
-        with open(DB_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
+        get_storage().save(data)
         return True
     except Exception as e:
         print(f"Error saving database: {e}")
         return False
 
-def get_next_id(database):
-    """Get the next available ID"""
-    if not database:
-        return 1
-    return max(database.keys()) + 1
+@trace.timed("save_host")
+def save_host(host_id, data, database=None):
+    """
+    Insert or replace a single host.
+    Pass the already loaded database to spare the JSON backend a reload.
+    """
+    try:
+        check_nickname(data.get("nickname"), host_id)
+        get_storage().put(host_id, data, database)
+        if database is not None:
+            database[host_id] = data
+        return True
+    except Exception as e:
+        print(f"Error saving database: {e}")
+        return False
+
+@trace.timed("save_hosts")
+def save_hosts(records, database=None):
+    """
+    Insert or replace several hosts in a single write.
+    records maps host ID to record.
+    """
+    try:
+        for host_id, data in records.items():
+            check_nickname(data.get("nickname"), host_id)
+        get_storage().put_many(records, database)
+        if database is not None:
+            database.update(records)
+        return True
+    except Exception as e:
+        print(f"Error saving database: {e}")
+        return False
+
+@trace.timed("remove_hosts")
+def remove_hosts(ids, database=None, updates=None):
+    """Delete hosts by ID, saving the {id: record} updates in the same write"""
+    try:
+        get_storage().delete(list(ids), database, updates)
+        return True
+    except Exception as e:
+        print(f"Error saving database: {e}")
+        return False
+
+@trace.timed("find_host")
+def find_host(identifier, connection=True):
+    """
+    Resolve an ID, nickname or 'user@host' using the backend's indexes.
+    Returns (host_id, record) or (None, None).
+    """
+    storage = get_storage()
+    identifier = identifier.strip()
+    if identifier.isdigit():
+        record = storage.get(int(identifier))
+        if record is not None:
+            return int(identifier), record
+    host_id = storage.find_nickname(identifier)
+    if host_id is None and connection and "@" in identifier:
+        host_id = storage.find_connection(identifier)
+    if host_id is None:
+        return None, None
+    return host_id, storage.get(host_id)
+
+def get_host(host_id):
+    """Return one host record by ID, or None"""
+    return get_storage().get(host_id)
+
+def list_ids():
+    """Return all host IDs in ascending order without decoding records"""
+    return get_storage().ids()
+
+def iter_hosts():
+    """Yield (host_id, record) in ID order, decoding one record at a time"""
+    return get_storage().items()
+
+def tagged(tag):
+    """Return the IDs carrying tag, ascending, from the backend's tag index"""
+    return get_storage().tag_ids(tag)
+
+def jump_users(host_ids):
+    """
+    Return the IDs, outside host_ids, of hosts that jump through any of
+    them, from the backend's jump index
+    """
+    storage = get_storage()
+    host_ids = set(host_ids)
+    return sorted({user for host_id in host_ids for user in storage.jump_ids(host_id)} - host_ids)
+
+def check_nickname(nickname, host_id=None):
+    """
+    Raise DuplicateNicknameError if nickname belongs to a host
+    other than host_id. Empty nicknames are always allowed.
+    """
+    if not nickname:
+        return
+    owner = get_storage().find_nickname(nickname)
+    if owner is not None and owner != host_id:
+        raise DuplicateNicknameError(f"Nickname '{nickname}' is already used by host {owner}")
+
+def get_next_id():
+    """
+    Get the next unused ID. IDs of deleted hosts are never reused, and
+    the backend answers from its indexes without scanning every key.
+    """
+    return get_storage().next_id()
+
+@trace.timed("renumber_hosts")
+def renumber_hosts(database=None):
+    """
+    Reassign IDs as 1..n in their current order and forget deleted IDs.
+    Returns the {old_id: new_id} mapping, or None if saving failed.
+    """
+    if database is None:
+        database = load_database()
+    mapping = {old_id: new_id for new_id, old_id in enumerate(sorted(database.keys()), 1)}
+    for data in database.values():
+        if data.get("jump"):
+            # A deleted jump host's old ID may now belong to another host
+            data["jump"] = mapping.get(data["jump"])
+    if not save_database({mapping[old_id]: data for old_id, data in database.items()}):
+        return None
+    get_storage().set_next_id(len(mapping) + 1)
+    # Connection stats are keyed by ID too
+    from . import stats
+    stats.fold(remap=mapping)
+    return mapping
 
 def get_database_path():
     """Return the path to the database file"""
-    return str(DB_FILE)
\ No newline at end of file
+    return str(get_storage().path)
+
+def connection_string(data):
+    """Return the 'user@host' string for a host record"""
+    return f"{data.get('username', '')}@{data.get('host', '')}"
+
+def parse_tags(value):
+    """
+    Turn 'prod, web' or ['@prod', 'web'] into ['prod', 'web'].
+    Raises ValueError for a tag with characters selectors treat specially.
+    """
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    tags = []
+    for tag in value or ():
+        tag = str(tag).strip().lstrip("@")
+        if not tag:
+            continue
+        if not TAG_PATTERN.match(tag):
+            raise ValueError(f"Invalid tag '{tag}'")
+        if tag not in tags:
+            tags.append(tag)
+    return tags
+
+class DuplicateNicknameError(ValueError):
+    """Raised when a nickname is already used by another host"""
+
+class HostIndex:
+    """
+    Hash indexes over a loaded database so lookups don't scan every record.
+    Keeps maps by ID, nickname and 'user@host', inverted tag -> IDs and
+    jump host -> IDs maps, plus a sorted nickname list for prefix queries.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.by_nickname = {}
+        self.by_connection = {}
+        self.by_tag = {}
+        self.by_jump = {}
+        self._nicknames = []
+        for host_id in sorted(database.keys()):
+            self._add(host_id, database[host_id])
+        self._nicknames.sort()
+
+    def _add(self, host_id, data):
+        nickname = data.get("nickname")
+        if nickname and nickname not in self.by_nickname:
+            self.by_nickname[nickname] = host_id
+            self._nicknames.append(nickname)
+        self.by_connection.setdefault(connection_string(data), []).append(host_id)
+        tags = data.get("tags")
+        if tags:
+            for tag in tags:
+                self.by_tag.setdefault(tag, set()).add(host_id)
+        if data.get("jump"):
+            self.by_jump.setdefault(data["jump"], set()).add(host_id)
+
+    def _remove(self, host_id, data):
+        nickname = data.get("nickname")
+        if nickname and self.by_nickname.get(nickname) == host_id:
+            del self.by_nickname[nickname]
+            pos = bisect.bisect_left(self._nicknames, nickname)
+            if pos < len(self._nicknames) and self._nicknames[pos] == nickname:
+                self._nicknames.pop(pos)
+        conn = connection_string(data)
+        ids = self.by_connection.get(conn, [])
+        if host_id in ids:
+            ids.remove(host_id)
+            if not ids:
+                del self.by_connection[conn]
+        for tag in data.get("tags") or ():
+            tagged = self.by_tag.get(tag)
+            if tagged is not None:
+                tagged.discard(host_id)
+                if not tagged:
+                    del self.by_tag[tag]
+        behind = self.by_jump.get(data.get("jump"))
+        if behind is not None:
+            behind.discard(host_id)
+            if not behind:
+                del self.by_jump[data["jump"]]
+
+    def get(self, host_id):
+        """Return the record for an ID, or None"""
+        return self.database.get(host_id)
+
+    def find_nickname(self, nickname):
+        """Return the ID owning a nickname, or None"""
+        return self.by_nickname.get(nickname)
+
+    def resolve(self, identifier, connection=True):
+        """
+        Resolve an ID, nickname or 'user@host' to a host ID.
+        Returns None if nothing matches.
+        """
+        identifier = identifier.strip()
+        if identifier.isdigit() and int(identifier) in self.database:
+            return int(identifier)
+        host_id = self.by_nickname.get(identifier)
+        if host_id is None and connection:
+            # Lowest ID wins, matching the old scan order
+            host_id = self.find_connection(identifier)
+        return host_id
+
+    def prefix(self, prefix):
+        """Return IDs whose nickname starts with prefix, ordered by nickname"""
+        start = bisect.bisect_left(self._nicknames, prefix)
+        ids = []
+        for nickname in self._nicknames[start:]:
+            if not nickname.startswith(prefix):
+                break
+            ids.append(self.by_nickname[nickname])
+        return ids
+
+    def glob(self, pattern):
+        """Return IDs whose nickname matches a shell-style pattern"""
+        import fnmatch
+        # Narrow to the literal prefix before the first wildcard
+        literal = pattern
+        for i, char in enumerate(pattern):
+            if char in "*?[":
+                literal = pattern[:i]
+                break
+        return [
+            host_id for host_id in self.prefix(literal)
+            if fnmatch.fnmatchcase(self.database[host_id]["nickname"], pattern)
+        ]
+
+    def find_connection(self, connection):
+        """Return the lowest ID with this 'user@host', or None"""
+        ids = self.by_connection.get(connection)
+        return min(ids) if ids else None
+
+    def tag_ids(self, tag):
+        """Return the IDs carrying tag, ascending"""
+        return sorted(self.by_tag.get(tag, ()))
+
+    def jump_ids(self, jump_id):
+        """Return the IDs whose jump host is jump_id, ascending"""
+        return sorted(self.by_jump.get(jump_id, ()))
+
+    def tags(self):
+        """Return {tag: number of hosts}"""
+        return {tag: len(ids) for tag, ids in self.by_tag.items()}
+
+    def max_id(self):
+        """Return the highest ID, or 0 for an empty database"""
+        return max(self.database.keys()) if self.database else 0
+
+    def ids(self):
+        """Return all IDs in ascending order"""
+        return sorted(self.database.keys())
+
+    def items(self):
+        """Yield (id, record) in ID order"""
+        for host_id in self.ids():
+            yield host_id, self.database[host_id]
+
+    def check_nickname(self, nickname, host_id=None):
+        """
+        Raise DuplicateNicknameError if nickname belongs to a host
+        other than host_id. Empty nicknames are always allowed.
+        """
+        if not nickname:
+            return
+        owner = self.by_nickname.get(nickname)
+        if owner is not None and owner != host_id:
+            raise DuplicateNicknameError(f"Nickname '{nickname}' is already used by host {owner}")
+
+    def put(self, host_id, data):
+        """Insert or replace a record, keeping the indexes in sync"""
+        self.check_nickname(data.get("nickname"), host_id)
+        old = self.database.get(host_id)
+        if old is not None:
+            self._remove(host_id, old)
+        self.database[host_id] = data
+        nickname = data.get("nickname")
+        if nickname:
+            bisect.insort(self._nicknames, nickname)
+            self.by_nickname[nickname] = host_id
+        self.by_connection.setdefault(connection_string(data), []).append(host_id)
+        for tag in data.get("tags") or ():
+            self.by_tag.setdefault(tag, set()).add(host_id)
+        if data.get("jump"):
+            self.by_jump.setdefault(data["jump"], set()).add(host_id)
+
+    def remove(self, host_id):
+        """Remove a record and its index entries"""
+        data = self.database.pop(host_id, None)
+        if data is not None:
+            self._remove(host_id, data)
+        return data
+
+def load_index():
+    """Load the database and build a HostIndex over it"""
+    return HostIndex(load_database())
@@ -0,0 +1,202 @@
+"""
+Host file formats for import and export
+
+Readers are generators that yield one plain host dict at a time, so a
+large file is never loaded whole. Supported formats are OpenSSH config
+Host blocks, CSV with a header row, and JSON lines.
+"""
+import csv
+import json
+import os
+import shlex
+
+FORMATS = ("ssh", "csv", "jsonl")
+
+# Column / key aliases accepted by the CSV and JSONL readers
+FIELD_ALIASES = {
+    "nickname": "nickname", "name": "nickname", "alias": "nickname",
+    "username": "username", "user": "username",
+    "host": "host", "hostname": "host", "address": "host",
+    "port": "port",
+    "ssh_key": "ssh_key", "identityfile": "ssh_key", "identity_file": "ssh_key", "key": "ssh_key",
+    "password": "password",
+    "handshake": "handshake",
+    "jump": "jump", "proxyjump": "jump", "jump_host": "jump", "bastion": "jump",
+    "tags": "tags", "tag": "tags", "groups": "tags",
+}
+
+class FormatError(ValueError):
+    """Raised for a line that cannot be turned into a host"""
+
+def detect_format(path, default="ssh"):
+    """Guess the format from a file name extension"""
+    name = os.path.basename(path).lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return default
+
+def normalize(fields):
+    """Map aliased keys onto host fields, dropping unknown ones"""
+    host = {}
+    for key, value in fields.items():
+        name = FIELD_ALIASES.get(str(key).strip().lower())
+        if name == "tags" and value:
+            from .database import parse_tags
+            try:
+                # A list in JSONL, 'prod web' or 'prod,web' in CSV
+                host["tags"] = parse_tags(value)
+            except ValueError as e:
+                raise FormatError(str(e))
+        elif name and value not in (None, ""):
+            host[name] = str(value).strip() if name != "port" else value
+    if not host.get("host"):
+        raise FormatError("missing host")
+    try:
+        host["port"] = int(host.get("port", 22))
+    except (TypeError, ValueError):
+        raise FormatError(f"invalid port {host.get('port')!r}")
+    return host
+
+def _entry(lineno, fields):
+    """Return (line number, host), or (line number, FormatError) for a bad entry"""
+    try:
+        return lineno, normalize(fields)
+    except FormatError as e:
+        return lineno, e
+
+def read_ssh_config(f):
+    """
+    Yield (line number, host) for each concrete Host block.
+    Wildcard patterns and Match blocks are skipped; Include is not followed.
+    """
+    block = None
+    start = 0
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        # Both 'Key value' and 'Key=value' are valid
+        key, _, value = line.replace("=", " ", 1).partition(" ")
+        key = key.lower()
+        value = value.strip()
+        if key in ("host", "match"):
+            if block is not None:
+                yield _ssh_entry(start, block)
+            block = None
+            if key == "host":
+                names = [n for n in shlex.split(value) if not any(c in n for c in "*?!")]
+                if names:
+                    block = {"nickname": names[0]}
+                    start = lineno
+            continue
+        if block is None:
+            continue
+        if len(value) > 1 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        if key == "identityfile":
+            value = os.path.expanduser(value)
+        # First value wins, as in ssh itself
+        if key in ("hostname", "user", "port", "identityfile", "proxyjump"):
+            block.setdefault(key, value)
+    if block is not None:
+        yield _ssh_entry(start, block)
+
+def _ssh_entry(lineno, block):
+    """HostName defaults to the Host alias itself"""
+    block.setdefault("hostname", block["nickname"])
+    return _entry(lineno, block)
+
+def read_csv(f):
+    """Yield (line number, host) for each CSV row"""
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield _entry(reader.line_num, row)
+
+def read_jsonl(f):
+    """Yield (line number, host) for each JSON line"""
+    for lineno, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield lineno, FormatError(f"invalid JSON ({e})")
+            continue
+        if not isinstance(fields, dict):
+            yield lineno, FormatError("expected an object")
+            continue
+        yield _entry(lineno, fields)
+
+READERS = {"ssh": read_ssh_config, "csv": read_csv, "jsonl": read_jsonl}
+
+def read_hosts(f, fmt):
+    """
+    Yield (line number, host) from an open file, one entry at a time.
+    Bad entries come back as a FormatError in place of the host so one
+    typo doesn't stop an import.
+    """
+    return READERS[fmt](f)
+
+# Fields written by every exporter, in column order
+EXPORT_FIELDS = ("id", "nickname", "username", "host", "port", "ssh_key", "handshake", "jump", "tags", "password")
+
+def _ssh_value(value):
+    """Quote an ssh config value if it contains whitespace"""
+    value = str(value)
+    return f'"{value}"' if any(c.isspace() for c in value) else value
+
+def host_writer(f, fmt, passwords=False, get_host=None):
+    """
+    Return a function write(host_id, record, password=None) that writes one
+    host to f in fmt. Exported records hold only portable fields; the
+    password column is included when passwords is True. Jump hosts are
+    written by nickname, looked up with get_host(host_id).
+    """
+    fields = EXPORT_FIELDS if passwords else EXPORT_FIELDS[:-1]
+
+    def host_name(host_id):
+        """Name a host is exported under, for references to it"""
+        record = get_host(host_id) if get_host else None
+        if record and record.get("nickname"):
+            return record["nickname"]
+        if fmt == "ssh":
+            return f"divein-{host_id}"
+        # user@host, which the importer resolves like ProxyJump
+        return f"{record['username']}@{record['host']}" if record else str(host_id)
+
+    def row(host_id, record, password):
+        values = {name: record.get(name, "") for name in fields}
+        values["id"] = host_id
+        values["jump"] = host_name(record["jump"]) if record.get("jump") else ""
+        tags = record.get("tags") or []
+        values["tags"] = tags if fmt == "jsonl" else " ".join(tags)
+        if passwords:
+            values["password"] = password or ""
+        return values
+
+    if fmt == "jsonl":
+        def write(host_id, record, password=None):
+            f.write(json.dumps(row(host_id, record, password)) + "\n")
+    elif fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        def write(host_id, record, password=None):
+            writer.writerow(row(host_id, record, password))
+    else:
+        # Passwords have no place in ssh config; callers warn instead
+        def write(host_id, record, password=None):
+            lines = [f"Host {_ssh_value(record.get('nickname') or f'divein-{host_id}')}"]
+            lines.append(f"    HostName {_ssh_value(record['host'])}")
+            if record.get("username"):
+                lines.append(f"    User {_ssh_value(record['username'])}")
+            if record.get("port") and int(record["port"]) != 22:
+                lines.append(f"    Port {record['port']}")
+            if record.get("ssh_key"):
+                lines.append(f"    IdentityFile {_ssh_value(record['ssh_key'])}")
+            if record.get("jump"):
+                lines.append(f"    ProxyJump {_ssh_value(host_name(record['jump']))}")
+            f.write("\n".join(lines) + "\n\n")
+    return write
@@ -0,0 +1,167 @@
+"""
+Jump hosts: reaching a host through one or more saved bastions
+
+A record's "jump" field holds the ID of the saved host to go through,
+which may have a jump of its own. ssh gets each hop as a ProxyCommand
+running 'ssh -W %h:%p' with the bastion's own ControlPath, so every
+session and exec job through a bastion shares that bastion's master.
+The bastion is authenticated once per mux_persist, not once per
+session.
+
+Hops run with BatchMode, so they never prompt or answer the target's
+askpass. open_masters logs into them first, one at a time with their
+own stored passwords. Without mux, hops must log in with a key or
+agent.
+"""
+import shlex
+import subprocess
+from .database import get_host, find_host
+from . import mux
+
+# Longest chain followed before it is treated as a loop
+MAX_HOPS = 8
+
+# Seconds a bastion login may take
+CONNECT_TIMEOUT = 10
+
+class JumpError(ValueError):
+    """Raised for a jump host that is missing or loops back"""
+
+def chain(host_data, get=get_host):
+    """
+    Return [(host_id, host_data)] for every hop, farthest bastion first.
+    get looks up a record by ID (default: the saved database).
+    """
+    hops = []
+    seen = set()
+    jump = host_data.get("jump")
+    while jump:
+        if jump in seen or len(hops) >= MAX_HOPS:
+            raise JumpError(f"Jump hosts loop back through host {jump}")
+        seen.add(jump)
+        hop = get(jump)
+        if hop is None:
+            raise JumpError(f"Jump host {jump} not found")
+        hops.append((jump, hop))
+        jump = hop.get("jump")
+    hops.reverse()
+    return hops
+
+def parse_jump(value, host_id=None):
+    """
+    Turn an ID, nickname or user@host into the ID of the host to jump
+    through, or None for an empty value. Raises JumpError if it matches
+    no host or the chain would lead back to host_id.
+    """
+    value = str(value or "").strip()
+    if not value:
+        return None
+    jump_id, jump_data = find_host(value)
+    if jump_data is None:
+        raise JumpError(f"Jump host '{value}' not found")
+    if host_id is not None and (jump_id == host_id or host_id in dict(chain(jump_data))):
+        raise JumpError(f"Host {jump_id} already goes through host {host_id}")
+    return jump_id
+
+def describe(host_data):
+    """The chain as 'edge (ID 1) -> bastion (ID 3)', or '' without a jump"""
+    try:
+        hops = chain(host_data)
+    except JumpError as e:
+        return str(e)
+    return " -> ".join(f"{hop.get('nickname') or hop['host']} (ID {hop_id})" for hop_id, hop in hops)
+
+def proxy_command(host_data):
+    """ProxyCommand value that reaches host_data through its jump host"""
+    from .ssh import build_ssh_command
+    bastion = get_host(host_data["jump"])
+    if bastion is None:
+        raise JumpError(f"Jump host {host_data['jump']} not found")
+    # Recurses through the bastion's own jump, if any
+    hop = build_ssh_command(bastion)
+    hop[1:1] = ["-o", "BatchMode=yes"]
+    hop[-1:-1] = ["-W", "%h:%p"]
+    # ssh expands %-tokens in ProxyCommand; only our own -W should expand
+    return " ".join(arg if arg == "%h:%p" else shlex.quote(arg).replace("%", "%%") for arg in hop)
+
+def ready(host_data):
+    """True if connecting needs no bastion login first"""
+    if not host_data.get("jump") or not mux.enabled():
+        return True
+    return all(mux.is_alive(hop) for _, hop in chain(host_data))
+
+def _stored_password(hop_id, hop):
+    if hop.get("encrypted_password"):
+        from .vault import decrypt_host_password
+        return decrypt_host_password(hop_id, hop)
+    return hop.get("password") or None
+
+def _open(hop_id, hop):
+    """Start a master for one bastion. Returns True on success"""
+    from .ssh import build_ssh_command, needs_password
+    ssh_command = build_ssh_command(hop)
+    # -N -f: authenticate, then leave the master running for mux_persist
+    ssh_command[1:1] = ["-N", "-f", "-o", f"ConnectTimeout={CONNECT_TIMEOUT}"]
+    try:
+        password = _stored_password(hop_id, hop) if needs_password(hop) else None
+    except ValueError:
+        return False
+    try:
+        if password:
+            from .askpass import PasswordServer, supported
+            ssh_command[1:1] = ["-o", "NumberOfPasswordPrompts=1"]
+            if not supported():
+                return _open_with_pexpect(ssh_command, password)
+            with PasswordServer(password) as server:
+                password = None
+                return subprocess.run(ssh_command, env=server.env()).returncode == 0
+        return subprocess.run(ssh_command).returncode == 0
+    except OSError:
+        return False
+
+def _open_with_pexpect(ssh_command, password):
+    """Answer the bastion's terminal prompt, for OpenSSH older than 8.4"""
+    import pexpect
+    child = pexpect.spawn(ssh_command[0], ssh_command[1:], encoding='utf-8', codec_errors='replace')
+    try:
+        index = child.expect([r"(?i)password:", pexpect.EOF, pexpect.TIMEOUT], timeout=CONNECT_TIMEOUT)
+        if index == 0:
+            child.sendline(password)
+        elif index == 2:
+            return False
+        # -f: ssh exits once the master is up in the background
+        return child.wait() == 0
+    finally:
+        if child.isalive():
+            child.terminate(force=True)
+
+def open_masters(hosts):
+    """
+    Make sure every bastion the hosts go through has a live master,
+    logging into each one once, farthest first. Hosts with a broken
+    chain are skipped; connecting to them reports the error.
+    Returns [(host_id, host_data)] for bastions that could not be opened.
+    """
+    hops = {}
+    for host_data in hosts:
+        if not host_data.get("jump"):
+            continue
+        try:
+            for hop_id, hop in chain(host_data):
+                hops.setdefault(hop_id, hop)
+        except JumpError:
+            continue
+
+    if not mux.enabled():
+        # Nothing to share; hops can only use keys
+        from .ssh import needs_password
+        return [(hop_id, hop) for hop_id, hop in hops.items() if needs_password(hop)]
+
+    failed = []
+    failed_ids = set()
+    # chain() lists farthest first, so a bastion's own jump is opened before it
+    for hop_id, hop in hops.items():
+        if hop.get("jump") in failed_ids or (not mux.is_alive(hop) and not _open(hop_id, hop)):
+            failed.append((hop_id, hop))
+            failed_ids.add(hop_id)
+    return failed
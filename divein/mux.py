@@ -0,0 +1,80 @@
+"""
+SSH connection multiplexing
+
+divein runs OpenSSH ControlMaster sessions with one control socket per
+host under ~/.divein/mux/. The first connection to a host authenticates
+and leaves a master running for mux_persist; later connects and exec
+commands reuse its transport and skip the handshake and password.
+"""
+import hashlib
+import os
+from .config import get_setting
+from .database import DB_DIR
+
+MUX_DIR = DB_DIR / "mux"
+
+def enabled():
+    """True if divein should manage ControlMaster sockets"""
+    return bool(get_setting("mux"))
+
+def host_key(host_data):
+    """Stable short name for a host's control socket"""
+    target = f"{host_data['username']}@{host_data['host']}:{host_data['port']}"
+    if host_data.get("jump"):
+        # The same name behind another bastion is another host
+        target += f" via {host_data['jump']}"
+    # Hashed to keep the socket path under the Unix socket length limit
+    return hashlib.sha1(target.encode()).hexdigest()[:16]
+
+def control_path(host_data):
+    """Return the control socket path for a host"""
+    return str(MUX_DIR / host_key(host_data))
+
+def ssh_options(host_data):
+    """ssh -o options that create or reuse the host's master"""
+    MUX_DIR.mkdir(parents=True, exist_ok=True, mode=0o700)
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={control_path(host_data)}",
+        "-o", f"ControlPersist={get_setting('mux_persist')}",
+    ]
+
+def control(path, command):
+    """Run 'ssh -O <command>' against a control socket. Returns the process"""
+    import subprocess
+    return subprocess.run(
+        ["ssh", "-o", f"ControlPath={path}", "-O", command, "divein-mux"],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=10
+    )
+
+def is_alive(host_data):
+    """True if an authenticated master is running for the host"""
+    if not enabled():
+        return False
+    path = control_path(host_data)
+    # Cheap check first: no socket, no master
+    if not os.path.exists(path):
+        return False
+    return control(path, "check").returncode == 0
+
+def masters():
+    """Yield (host_key, path, pid or None) for every live control socket"""
+    if not MUX_DIR.exists():
+        return
+    for entry in sorted(os.scandir(MUX_DIR), key=lambda e: e.name):
+        result = control(entry.path, "check")
+        if result.returncode != 0:
+            # Stale socket left by a killed master
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+            continue
+        # "Master running (pid=1234)"
+        output = result.stderr.strip()
+        pid = output.split("pid=")[-1].rstrip(")") if "pid=" in output else None
+        yield entry.name, entry.path, pid
+
+def stop(path):
+    """Ask a master to exit. Returns True on success"""
+    return control(path, "exit").returncode == 0
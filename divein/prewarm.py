@@ -0,0 +1,79 @@
+"""
+Pre-warm connections to the hosts used most
+
+For the top hosts by frecency, open a multiplexed master in the
+background so the next 'divein <host>' reuses an authenticated
+transport. Hosts that need a password can't be logged into unattended;
+for them, and when mux is off, only the DNS name is resolved, which
+primes any caching resolver on the way.
+"""
+import os
+import socket
+import subprocess
+from .config import get_setting
+from .database import get_host
+from . import mux, stats
+
+# Seconds a background login may take before it is abandoned
+CONNECT_TIMEOUT = 5
+
+def _warm(host_id, host_data):
+    """Warm one host. Returns (host_id, action, ok)"""
+    from .ssh import build_ssh_command, needs_password
+    if mux.enabled() and not needs_password(host_data):
+        if mux.is_alive(host_data):
+            return host_id, "master", True
+        ssh_command = build_ssh_command(host_data)
+        # -N -f: authenticate, then leave the master running for mux_persist
+        ssh_command[1:1] = ["-N", "-f", "-o", "BatchMode=yes", "-o", f"ConnectTimeout={CONNECT_TIMEOUT}"]
+        try:
+            result = subprocess.run(ssh_command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, timeout=CONNECT_TIMEOUT * 3)
+            return host_id, "master", result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return host_id, "master", False
+    try:
+        socket.getaddrinfo(host_data["host"], host_data.get("port", 22), type=socket.SOCK_STREAM)
+        return host_id, "dns", True
+    except (OSError, UnicodeError):
+        return host_id, "dns", False
+
+def prewarm(limit, exclude=None):
+    """Warm the top limit hosts by frecency, skipping exclude. Returns [(host_id, action, ok)]"""
+    targets = []
+    for host_id in stats.rank():
+        if len(targets) >= limit:
+            break
+        if host_id == exclude:
+            continue
+        host_data = get_host(host_id)
+        if host_data is not None:
+            targets.append((host_id, host_data))
+    if not targets:
+        return []
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        return list(pool.map(lambda target: _warm(*target), targets))
+
+def start_in_background(exclude=None):
+    """If the prewarm setting is on, warm the top hosts from a detached child"""
+    limit = get_setting("prewarm")
+    if limit <= 0:
+        return
+    pid = os.fork()
+    if pid == 0:
+        # Double fork so the warmer is never left as a zombie, in its own
+        # session and off the terminal so nothing it does reaches the user
+        try:
+            if os.fork() == 0:
+                os.setsid()
+                devnull = os.open(os.devnull, os.O_RDWR)
+                for fd in (0, 1, 2):
+                    os.dup2(devnull, fd)
+                # Don't share the parent's storage handle (e.g. SQLite) across fork
+                from . import database
+                database._storage = None
+                prewarm(limit, exclude)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
@@ -0,0 +1,125 @@
+"""
+Concurrent reachability probes
+
+Each probe opens a TCP connection to the host's SSH port and waits for the
+server's 'SSH-' banner, measuring connect round-trip time. Probes run
+concurrently on one asyncio loop with a cap on open connections. Results
+are cached in ~/.divein/probe_cache.json with the time they were taken.
+"""
+import asyncio
+import json
+import os
+import time
+from .database import DB_DIR, ensure_db_dir
+
+PROBE_CACHE_FILE = DB_DIR / "probe_cache.json"
+
+async def probe_host(host, port, timeout):
+    """
+    Probe one host:port.
+    Returns a dict with status ('up', 'open', 'down' or 'timeout'),
+    rtt_ms, banner and checked (epoch seconds).
+    """
+    result = {"host": host, "port": port, "status": "down", "rtt_ms": None,
+              "banner": "", "checked": time.time()}
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        result["status"] = "timeout"
+        return result
+    except OSError as e:
+        result["banner"] = e.strerror or str(e)
+        return result
+    
+    result["rtt_ms"] = round((loop.time() - start) * 1000, 1)
+    result["status"] = "open"
+    try:
+        banner = await asyncio.wait_for(reader.readline(), timeout)
+        banner = banner.decode(errors="replace").strip()
+        result["banner"] = banner[:80]
+        if banner.startswith("SSH-"):
+            result["status"] = "up"
+    except (asyncio.TimeoutError, OSError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return result
+
+async def probe_many(targets, concurrency=256, timeout=3.0, on_result=None):
+    """
+    Probe {host_id: host_data} concurrently.
+    on_result(host_id, result) is called as each probe finishes.
+    Returns {host_id: result}.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = {}
+    
+    async def run(host_id, host_data):
+        async with semaphore:
+            result = await probe_host(host_data["host"], int(host_data["port"]), timeout)
+        results[host_id] = result
+        if on_result:
+            on_result(host_id, result)
+    
+    await asyncio.gather(*(run(host_id, data) for host_id, data in targets.items()))
+    return results
+
+def run_probes(targets, concurrency=256, timeout=3.0, on_result=None):
+    """Synchronous wrapper around probe_many that also updates the cache"""
+    results = asyncio.run(probe_many(targets, concurrency, timeout, on_result))
+    save_cache(results)
+    return results
+
+def load_cache():
+    """Return cached results as {host_id: result}"""
+    if not PROBE_CACHE_FILE.exists():
+        return {}
+    try:
+        with open(PROBE_CACHE_FILE, 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(results):
+    """Merge results into the cache file"""
+    cache = load_cache()
+    cache.update(results)
+    ensure_db_dir()
+    tmp = f"{PROBE_CACHE_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, PROBE_CACHE_FILE)
+
+def cached_result(cache, host_id, host_data):
+    """Return the cached result for a host if it still matches its address"""
+    result = cache.get(host_id)
+    if result and result.get("host") == host_data["host"] and result.get("port") == int(host_data["port"]):
+        return result
+    return None
+
+def format_age(seconds):
+    """Compact age string such as '42s', '5m' or '3h'"""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h"
+    return f"{int(seconds // 86400)}d"
+
+def format_status(result):
+    """Rich markup describing a probe result"""
+    if result is None:
+        return "[dim]…[/dim]"
+    status = result["status"]
+    if status == "up":
+        return f"[green]up {result['rtt_ms']:.0f}ms[/green]"
+    if status == "open":
+        return f"[yellow]open {result['rtt_ms']:.0f}ms[/yellow]"
+    return f"[red]{status}[/red]"
@@ -0,0 +1,134 @@
+"""
+Non-interactive command execution across many hosts
+"""
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .ssh import build_ssh_command
+
+def host_label(host_id, host_data):
+    """Short name used to prefix a host's output"""
+    return host_data.get("nickname") or f"{host_data['username']}@{host_data['host']}"
+
+def _batch_command(host_data, password, command, timeout):
+    ssh_command = build_ssh_command(host_data)
+    options = ["-o", f"ConnectTimeout={max(1, int(timeout))}"]
+    if password:
+        options += ["-o", "NumberOfPasswordPrompts=1"]
+    else:
+        # Fail instead of hanging on a prompt nobody can answer
+        options += ["-o", "BatchMode=yes"]
+    ssh_command[1:1] = options
+    ssh_command.append(command)
+    return ssh_command
+
+def _run_with_key(ssh_command, timeout, emit):
+    proc = subprocess.Popen(
+        ssh_command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, text=True, errors="replace"
+    )
+    expired = threading.Event()
+    
+    def kill():
+        expired.set()
+        proc.kill()
+    
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            emit(line.rstrip("\n"))
+        proc.wait()
+    finally:
+        timer.cancel()
+    return proc.returncode, expired.is_set()
+
+def _run_with_password(ssh_command, password, timeout, emit):
+    import pexpect
+    
+    deadline = time.monotonic() + timeout
+    child = pexpect.spawn(ssh_command[0], ssh_command[1:], encoding='utf-8', codec_errors='replace')
+    try:
+        index = child.expect([r"(?i)password:", pexpect.EOF, pexpect.TIMEOUT], timeout=timeout)
+        if index == 0:
+            child.sendline(password)
+        else:
+            for line in (child.before or "").splitlines():
+                if line.strip():
+                    emit(line)
+            child.close()
+            return (child.exitstatus if index == 1 else None), index == 2
+        
+        # Skip the echo of the newline after the password
+        first = True
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, True
+            index = child.expect([r"\r?\n", pexpect.EOF, pexpect.TIMEOUT], timeout=remaining)
+            if index == 0:
+                if not (first and not child.before.strip()):
+                    emit(child.before)
+                first = False
+            elif index == 1:
+                if child.before:
+                    emit(child.before)
+                child.close()
+                return child.exitstatus, False
+            else:
+                return None, True
+    finally:
+        if child.isalive():
+            child.terminate(force=True)
+
+def run_on_host(host_id, host_data, password, command, timeout, on_line=None):
+    """
+    Run command on one host without a terminal.
+    on_line(label, line) is called for each output line as it arrives.
+    Returns a result dict with status, exit code and collected output.
+    """
+    label = host_label(host_id, host_data)
+    output = []
+    
+    def emit(line):
+        output.append(line)
+        if on_line:
+            on_line(label, line)
+    
+    start = time.monotonic()
+    ssh_command = _batch_command(host_data, password, command, timeout)
+    try:
+        if password:
+            exit_code, timed_out = _run_with_password(ssh_command, password, timeout, emit)
+        else:
+            exit_code, timed_out = _run_with_key(ssh_command, timeout, emit)
+        status = "timeout" if timed_out else ("ok" if exit_code == 0 else "failed")
+    except Exception as e:
+        exit_code, status = None, "error"
+        emit(f"divein: {e}")
+    
+    return {
+        "id": host_id,
+        "name": label,
+        "host": f"{host_data['username']}@{host_data['host']}:{host_data['port']}",
+        "status": status,
+        "exit_code": exit_code,
+        "elapsed": round(time.monotonic() - start, 3),
+        "output": output,
+    }
+
+def run_many(targets, command, workers=16, timeout=60, on_line=None, on_result=None):
+    """
+    Run command on every (host_id, host_data, password) target using a
+    bounded thread pool. Returns results in target order.
+    """
+    def run(target):
+        host_id, host_data, password = target
+        result = run_on_host(host_id, host_data, password, command, timeout, on_line)
+        if on_result:
+            on_result(result)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, targets))
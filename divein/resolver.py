@@ -0,0 +1,218 @@
+"""
+DNS cache for saved host names
+
+'divein resolve' looks up every saved host name concurrently on one
+asyncio loop and stores the addresses in ~/.divein/dns/, one small file
+per name with its expiry, so a connect reads only its own entry.
+Connects then give ssh a fresh cached address with -o HostName=<address>,
+keeping the original name as the destination and as HostKeyAlias so
+ssh config matching and host key checks still use the name. On a miss or an expired entry ssh resolves the name itself,
+and an interactive connect refreshes the entry in the background.
+
+With dnspython installed (pip install divein[dns]) A and AAAA records
+are queried directly and cached for their own TTL; otherwise the
+system resolver (getaddrinfo) is used and entries live for dns_ttl.
+
+Names that ~/.ssh/config maps to another HostName are never cached or
+used from the cache, since overriding them would bypass that mapping. Neither are hosts
+behind a jump host, whose names the bastion resolves.
+"""
+import ipaddress
+import os
+import time
+from .database import DB_DIR, ensure_db_dir
+
+# One small file per name, so a connect reads only its own entry
+DNS_CACHE_DIR = DB_DIR / "dns"
+SSH_CONFIG = os.path.expanduser("~/.ssh/config")
+
+def is_address(name):
+    """True for IP literals, which need no lookup"""
+    try:
+        ipaddress.ip_address(name.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+def ssh_aliases():
+    """Host names ~/.ssh/config rewrites to a different HostName"""
+    from .formats import read_ssh_config
+    aliases = set()
+    try:
+        with open(SSH_CONFIG, 'r') as f:
+            for _, host in read_ssh_config(f):
+                if isinstance(host, dict) and host["host"] != host.get("nickname"):
+                    aliases.add(host["nickname"])
+    except OSError:
+        pass
+    return aliases
+
+def _entry_path(name):
+    """Cache file for name, or None if the name can't be a file name"""
+    if not name or name.startswith(".") or not all(c.isalnum() or c in ".-_" for c in name):
+        return None
+    return DNS_CACHE_DIR / name
+
+def _read_entry(path):
+    """(addresses, resolved, expires) from a cache file, or None"""
+    try:
+        with open(path, 'r') as f:
+            fields = f.read().split()
+        if len(fields) < 3:
+            return None
+        return fields[2:], float(fields[0]), float(fields[1])
+    except (OSError, ValueError):
+        return None
+
+def store(results):
+    """Save {name: (addresses, ttl)}; names without addresses are dropped"""
+    now = time.time()
+    ensure_db_dir()
+    os.makedirs(DNS_CACHE_DIR, mode=0o700, exist_ok=True)
+    for name, (addresses, ttl) in results.items():
+        path = _entry_path(name)
+        if path is None:
+            continue
+        if not addresses:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            continue
+        # Dot-prefixed, so it can never clash with a cached name
+        tmp = DNS_CACHE_DIR / f".{name}.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            f.write(f"{now} {now + ttl} {' '.join(addresses)}\n")
+        os.replace(tmp, path)
+
+def lookup(name):
+    """Return (addresses, expires) for a cached name, or None"""
+    path = _entry_path(name)
+    entry = _read_entry(path) if path is not None else None
+    if entry is None:
+        return None
+    return entry[0], entry[2]
+
+def entries():
+    """Return [(name, addresses, resolved, expires)] for every cached name"""
+    try:
+        names = sorted(name for name in os.listdir(DNS_CACHE_DIR) if not name.startswith("."))
+    except OSError:
+        return []
+    rows = []
+    for name in names:
+        entry = _read_entry(DNS_CACHE_DIR / name)
+        if entry is not None:
+            rows.append((name, *entry))
+    return rows
+
+def ssh_options(host_data, refresh=False):
+    """
+    ssh options pinning the host's name to a fresh cached address, or []
+    to let ssh resolve it. With refresh, a missing or expired entry is
+    looked up again in the background for next time.
+    """
+    from .config import get_setting
+    name = host_data["host"]
+    if is_address(name) or not DNS_CACHE_DIR.exists() or not get_setting("dns_cache"):
+        return []
+    cached = lookup(name)
+    fresh = cached is not None and cached[1] > time.time()
+    if not fresh and not refresh:
+        return []
+    # An alias added to ~/.ssh/config after the name was cached still wins
+    if name in ssh_aliases():
+        return []
+    if fresh:
+        return ["-o", f"HostName={cached[0][0]}", "-o", f"HostKeyAlias={name}"]
+    refresh_in_background(name, host_data.get("port", 22))
+    return []
+
+async def _getaddrinfo(name, port, timeout, ttl):
+    import asyncio
+    import socket
+    loop = asyncio.get_running_loop()
+    infos = await asyncio.wait_for(loop.getaddrinfo(name, port, type=socket.SOCK_STREAM), timeout)
+    addresses = []
+    for _, _, _, _, sockaddr in infos:
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses, ttl
+
+async def _dnspython(resolver, name, timeout):
+    import dns.exception
+    import dns.resolver
+    addresses = []
+    ttls = []
+    for rdtype in ("A", "AAAA"):
+        try:
+            answer = await resolver.resolve(name, rdtype, lifetime=timeout, search=True)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            continue
+        except (dns.resolver.NoNameservers, dns.exception.Timeout) as e:
+            raise OSError(str(e))
+        addresses.extend(record.address for record in answer)
+        ttls.append(answer.rrset.ttl)
+    return addresses, min(ttls) if ttls else 0
+
+def _dns_resolver():
+    """A dnspython async resolver, or None if dnspython isn't installed"""
+    try:
+        import dns.asyncresolver
+    except ImportError:
+        return None
+    return dns.asyncresolver.Resolver()
+
+async def resolve_many(names, concurrency=256, timeout=5.0, ttl=300, on_result=None):
+    """
+    Resolve {name: port} concurrently.
+    on_result(name, addresses, ttl, error) is called as each finishes.
+    Returns {name: (addresses, ttl)}; failed names have no addresses.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    resolver = _dns_resolver()
+    results = {}
+
+    async def run(name, port):
+        addresses, entry_ttl, error = [], 0, None
+        async with semaphore:
+            try:
+                if resolver is not None:
+                    addresses, entry_ttl = await _dnspython(resolver, name, timeout)
+                if not addresses:
+                    # Also covers /etc/hosts and other NSS sources dnspython skips
+                    addresses, entry_ttl = await _getaddrinfo(name, port, timeout, ttl)
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except (OSError, UnicodeError) as e:
+                error = getattr(e, "strerror", None) or str(e)
+        results[name] = (addresses, entry_ttl)
+        if on_result:
+            on_result(name, addresses, entry_ttl, error)
+
+    await asyncio.gather(*(run(name, port) for name, port in names.items()))
+    return results
+
+def resolve_names(names, concurrency=256, timeout=5.0, ttl=300, on_result=None):
+    """Synchronous wrapper around resolve_many that also updates the cache"""
+    import asyncio
+    results = asyncio.run(resolve_many(names, concurrency, timeout, ttl, on_result))
+    store(results)
+    return results
+
+def refresh_in_background(name, port=22):
+    """Re-resolve one name from a detached child"""
+    pid = os.fork()
+    if pid == 0:
+        # Double fork so the resolver is never left as a zombie
+        try:
+            if os.fork() == 0:
+                os.setsid()
+                from .config import get_setting
+                resolve_names({name: port}, timeout=get_setting("resolve_timeout"), ttl=get_setting("dns_ttl"))
+        except Exception:
+            pass
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
@@ -0,0 +1,90 @@
+"""
+Incremental fuzzy search over nickname, host and username
+
+A query matches a host when its characters appear in order in the host's
+search text ("nickname user@host"). The index is built once per session:
+for every character, the position of its first occurrence in each host's
+text, plus a sorted nickname list for prefix hits.
+
+Each keystroke extends the previous match set instead of rescanning the
+inventory: every surviving host keeps the position where the query so far
+ended, so checking one more character is a single str.find from there.
+Backspace pops back to the previous result set. Hosts are ranked by
+nickname prefix first, then by how early the match ends, i.e. the
+position of the query's last character in the search text.
+"""
+import bisect
+import heapq
+from operator import itemgetter
+
+class FuzzySearch:
+    """Search session over a {id: record} database"""
+
+    def __init__(self, database):
+        self.database = database
+        self.keys = {}
+        self.first = {}
+        self.nicknames = []
+        for host_id, data in database.items():
+            nickname = (data.get("nickname") or "").lower()
+            key = f"{nickname} {data.get('username', '')}@{data.get('host', '')}".lower()
+            self.keys[host_id] = key
+            for char in set(key):
+                self.first.setdefault(char, {})[host_id] = key.find(char)
+            if nickname:
+                self.nicknames.append((nickname, host_id))
+        self.nicknames.sort()
+        # (query, {id: end position of the match}) for each prefix of the query
+        self.stack = [("", None)]
+
+    def update(self, query):
+        """Set the current query and return {id: match end position}"""
+        query = query.lower()
+        # Drop results for anything that is no longer a prefix (backspace, edits)
+        while len(self.stack) > 1 and not query.startswith(self.stack[-1][0]):
+            self.stack.pop()
+        
+        keys = self.keys
+        while self.stack[-1][0] != query:
+            prev_query, prev = self.stack[-1]
+            char = query[len(prev_query)]
+            first = self.first.get(char, {})
+            if prev is None:
+                matches = first
+            else:
+                # Hosts without the character at all are dropped by a set
+                # intersection; the rest need one find from their last match
+                matches = {}
+                for host_id in prev.keys() & first.keys():
+                    end = prev[host_id]
+                    pos = first[host_id]
+                    if pos <= end:
+                        pos = keys[host_id].find(char, end + 1)
+                        if pos < 0:
+                            continue
+                    matches[host_id] = pos
+            self.stack.append((query[:len(prev_query) + 1], matches))
+        return self.stack[-1][1] or {}
+
+    def top(self, query, limit=5):
+        """Return up to limit best-ranked IDs for query"""
+        matches = self.update(query)
+        if not query:
+            return []
+        query = query.lower()
+        
+        # Nickname prefix hits come straight from the sorted list
+        best = []
+        start = bisect.bisect_left(self.nicknames, (query,))
+        for nickname, host_id in self.nicknames[start:start + limit]:
+            if not nickname.startswith(query):
+                break
+            best.append(host_id)
+        if len(best) < limit:
+            seen = set(best)
+            for host_id, _ in heapq.nsmallest(limit + len(best), matches.items(), key=itemgetter(1)):
+                if host_id not in seen:
+                    best.append(host_id)
+                    if len(best) == limit:
+                        break
+        return best
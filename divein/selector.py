@@ -0,0 +1,224 @@
+"""
+Host selectors shared by every command that takes several hosts
+
+A selector is a comma-separated list of parts:
+    42          one ID
+    4-7         an ID range; open-ended as 100- or -50
+    web         a nickname
+    db-*        a nickname glob (*, ?, [...])
+    root@host   every host with that connection
+    @prod       every host tagged prod
+    a&b         hosts matched by both a and b, e.g. @prod&@web; a term
+                written !b inside it is subtracted (@prod&!db-*)
+    !part       exclude whatever part matches
+
+Included parts are unioned and excluded parts subtracted from the result.
+A selector made only of exclusions starts from every host. A part that
+is also a nickname selects the nickname, so 'eu-1' can't be misread as
+a range.
+
+Everything is evaluated as sorted interval sets over the sorted ID list.
+A range costs two binary searches however wide it is, globs go through
+the nickname index and tags through the inverted tag index. Selectors
+without globs or 'user@host' parts run against the storage backend's
+own indexes, so they don't need the whole database loaded.
+"""
+import bisect
+import re
+
+RANGE = re.compile(r"^(\d*)-(\d*)$")
+GLOB_CHARS = "*?["
+
+class Selection:
+    """IDs picked by a selector, ascending, plus the parts that matched no host"""
+
+    def __init__(self, ids, unmatched):
+        self.ids = ids
+        self.unmatched = unmatched
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+def _merge(intervals):
+    """Sort and coalesce (start, end) pairs into disjoint intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def _subtract(intervals, removed):
+    """Remove one merged interval list from another"""
+    result = []
+    i = 0
+    for start, end in intervals:
+        while i < len(removed) and removed[i][1] < start:
+            i += 1
+        j = i
+        while start <= end and j < len(removed) and removed[j][0] <= end:
+            if removed[j][0] > start:
+                result.append((start, removed[j][0] - 1))
+            start = max(start, removed[j][1] + 1)
+            j += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+def _intersect(a, b):
+    """Intersect two merged interval lists"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start <= end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _points(ids):
+    return [(host_id, host_id) for host_id in ids]
+
+def _terms(expression):
+    """Every term of a selector, without ! prefixes"""
+    for part in expression.split(","):
+        for term in part.split("&"):
+            term = term.strip().lstrip("!").strip()
+            if term:
+                yield term
+
+def _needs_index(term):
+    # Globs and 'user@host' lookups need the in-memory HostIndex
+    return any(c in term for c in GLOB_CHARS) or ("@" in term and not term.startswith("@"))
+
+def _part_intervals(part, index, ids):
+    """Intervals selected by one part, and the terms in it that matched no host"""
+    if "&" in part and index.find_nickname(part) is None:
+        result = None
+        removed = []
+        unmatched = []
+        for term in (t.strip() for t in part.split("&")):
+            negate = term.startswith("!")
+            term = term.lstrip("!").strip()
+            if not term:
+                continue
+            intervals, matched = _term_intervals(term, index, ids)
+            if not matched:
+                unmatched.append(f"!{term}" if negate else term)
+            if negate:
+                removed.extend(intervals)
+            else:
+                intervals = _merge(intervals)
+                result = intervals if result is None else _intersect(result, intervals)
+        if result is None:
+            # Only subtractions: start from every host
+            result = [(ids[0], ids[-1])] if ids else []
+        return _subtract(result, _merge(removed)), unmatched
+    intervals, matched = _term_intervals(part, index, ids)
+    return intervals, [] if matched else [part]
+
+def _term_intervals(part, index, ids):
+    """Intervals selected by one term, and whether any existing host is in them"""
+    if part.isdigit():
+        interval = (int(part), int(part))
+    else:
+        match = RANGE.match(part)
+        if match and (match.group(1) or match.group(2)) and index.find_nickname(part) is None:
+            start = int(match.group(1)) if match.group(1) else 0
+            if match.group(2):
+                end = int(match.group(2))
+                if start > end:
+                    start, end = end, start
+            else:
+                end = max(start, ids[-1] if ids else 0)
+            interval = (start, end)
+        elif part.startswith("@") and index.find_nickname(part) is None:
+            found = _points(index.tag_ids(part[1:]))
+            return found, bool(found)
+        elif any(c in part for c in GLOB_CHARS):
+            found = _points(index.glob(part))
+            return found, bool(found)
+        elif "@" in part and index.find_nickname(part) is None:
+            found = _points(index.by_connection.get(part, []))
+            return found, bool(found)
+        else:
+            host_id = index.find_nickname(part)
+            found = _points([host_id] if host_id is not None else [])
+            return found, bool(found)
+    lo = bisect.bisect_left(ids, interval[0])
+    return [interval], lo < len(ids) and ids[lo] <= interval[1]
+
+def select(expression, index=None):
+    """
+    Evaluate a selector against a HostIndex. Without one, the storage
+    backend answers if it can, else the database is loaded and indexed.
+    Returns a Selection.
+    """
+    if index is None:
+        from .database import get_storage, load_index
+        if any(_needs_index(term) for term in _terms(expression)):
+            index = load_index()
+        else:
+            index = get_storage()
+    ids = index.ids()
+    include = []
+    exclude = []
+    only_exclusions = True
+    unmatched = []
+
+    for part in (p.strip() for p in expression.split(",")):
+        negate = part.startswith("!")
+        if negate:
+            part = part[1:].strip()
+        if not part:
+            continue
+        intervals, missing = _part_intervals(part, index, ids)
+        if not intervals and not missing:
+            # Every term matched something, but not the same hosts
+            missing = [part]
+        unmatched.extend(f"!{term}" if negate else term for term in missing)
+        if negate:
+            exclude.extend(intervals)
+        else:
+            include.extend(intervals)
+            only_exclusions = False
+
+    if only_exclusions and exclude:
+        include = [(ids[0], ids[-1])] if ids else []
+    selected = _subtract(_merge(include), _merge(exclude))
+
+    result = []
+    for start, end in selected:
+        result.extend(ids[bisect.bisect_left(ids, start):bisect.bisect_right(ids, end)])
+    return Selection(result, unmatched)
+
+def is_single(expression):
+    """
+    True if expression names at most one host (an ID or nickname), so
+    callers can use the indexed find_host path instead of loading every
+    host.
+    """
+    expression = expression.strip()
+    if not expression or any(c in expression for c in ",&@") or expression.startswith("!"):
+        return False
+    if any(c in expression for c in GLOB_CHARS):
+        return False
+    return expression.isdigit() or not RANGE.match(expression)
+
+def warn_unmatched(selection):
+    """Print the parts of a selector that matched no host"""
+    from rich import print
+    if selection.unmatched:
+        print(f"[yellow]No hosts match: {', '.join(selection.unmatched)}[/yellow]")
@@ -0,0 +1,296 @@
+"""
+Binary index snapshot for read-only lookups on the JSON backends
+
+database.json.idx holds every record pre-serialized plus sorted lookup
+tables, and is tagged with the source file's mtime and size. Readers
+mmap it and binary-search the tables, so finding one host by ID,
+nickname or 'user@host' decodes only that host's record instead of
+parsing the whole database. A stale or missing snapshot is rebuilt by
+the next reader that has to do a full load anyway.
+
+The journal backend keys its snapshot on the base file alone and lays
+the journal's few changes over it in memory (Overlay), so appends don't
+make the snapshot stale.
+
+Layout (little endian):
+    header   magic, version, signature length, record/nickname/connection/tag/jump counts
+    signature  JSON of the source signature
+    ids        (id: int64, offset: uint64, length: uint32), sorted by id
+    nicknames  (crc32: uint32, id: int64), sorted by hash
+    connections (crc32: uint32, id: int64), sorted by hash
+    jumps      (jump host id: int64, id: int64), sorted
+    tags       (crc32: uint32, offset: uint64, count: uint32), sorted by hash
+    data       compact JSON of each record
+    postings   per tag: name length (uint16), name, then count sorted int64 IDs
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+
+MAGIC = b"DVIX"
+VERSION = 3
+HEADER = struct.Struct("<4sIIIIIII")
+ID_ENTRY = struct.Struct("<qQI")
+KEY_ENTRY = struct.Struct("<Iq")
+JUMP_ENTRY = struct.Struct("<qq")
+TAG_ENTRY = struct.Struct("<IQI")
+NAME_LENGTH = struct.Struct("<H")
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+def _hash(text):
+    # Collisions are fine: every hit is checked against the decoded record
+    return zlib.crc32(text.encode())
+
+def _connection(data):
+    return f"{data.get('username', '')}@{data.get('host', '')}"
+
+def _encode_signature(signature):
+    return _encode(signature).encode()
+
+def write(path, signature, database):
+    """Write a snapshot of database tagged with the source signature"""
+    ids = sorted(database.keys())
+    blobs = [_encode(database[host_id]).encode() for host_id in ids]
+    nicknames = sorted(
+        (_hash(database[host_id]["nickname"]), host_id)
+        for host_id in ids if database[host_id].get("nickname")
+    )
+    connections = sorted((_hash(_connection(database[host_id])), host_id) for host_id in ids)
+    jumps = sorted((database[host_id]["jump"], host_id) for host_id in ids if database[host_id].get("jump"))
+    tagged = {}
+    for host_id in ids:
+        for tag in database[host_id].get("tags") or ():
+            tagged.setdefault(tag, []).append(host_id)
+    sig = _encode_signature(signature)
+    
+    data_start = (HEADER.size + len(sig) + ID_ENTRY.size * len(ids)
+                  + KEY_ENTRY.size * (len(nicknames) + len(connections))
+                  + JUMP_ENTRY.size * len(jumps) + TAG_ENTRY.size * len(tagged))
+    parts = [HEADER.pack(MAGIC, VERSION, len(sig), len(ids), len(nicknames), len(connections),
+                         len(tagged), len(jumps)), sig]
+    offset = data_start
+    for host_id, blob in zip(ids, blobs):
+        parts.append(ID_ENTRY.pack(host_id, offset, len(blob)))
+        offset += len(blob)
+    parts.extend(KEY_ENTRY.pack(h, host_id) for h, host_id in nicknames)
+    parts.extend(KEY_ENTRY.pack(h, host_id) for h, host_id in connections)
+    parts.extend(JUMP_ENTRY.pack(jump, host_id) for jump, host_id in jumps)
+    # Posting lists go after the records; IDs are already ascending
+    postings = []
+    tag_entries = []
+    for tag, tag_ids in tagged.items():
+        name = tag.encode()
+        tag_entries.append((_hash(tag), offset, len(tag_ids)))
+        postings.append(NAME_LENGTH.pack(len(name)) + name + struct.pack(f"<{len(tag_ids)}q", *tag_ids))
+        offset += len(postings[-1])
+    parts.extend(TAG_ENTRY.pack(*entry) for entry in sorted(tag_entries))
+    parts.extend(blobs)
+    parts.extend(postings)
+    
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(b"".join(parts))
+    os.replace(tmp, path)
+
+class Snapshot:
+    """Read-only view over a memory-mapped snapshot file"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        _, _, sig_len, self.count, nick_count, conn_count, tag_count, jump_count = HEADER.unpack_from(buf, 0)
+        self.ids_at = HEADER.size + sig_len
+        self.nicks_at = self.ids_at + ID_ENTRY.size * self.count
+        self.conns_at = self.nicks_at + KEY_ENTRY.size * nick_count
+        self.jumps_at = self.conns_at + KEY_ENTRY.size * conn_count
+        self.tags_at = self.jumps_at + JUMP_ENTRY.size * jump_count
+        self.jump_count = jump_count
+        self.nick_count = nick_count
+        self.conn_count = conn_count
+        self.tag_count = tag_count
+
+    @classmethod
+    def open(cls, path, signature):
+        """Return a Snapshot if path exists and matches signature, else None"""
+        try:
+            with open(path, 'rb') as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, sig_len = HEADER.unpack_from(buf, 0)[:3]
+            sig = bytes(buf[HEADER.size:HEADER.size + sig_len])
+        except struct.error:
+            return None
+        if magic != MAGIC or version != VERSION or sig != _encode_signature(signature):
+            return None
+        return cls(buf)
+
+    def _id_entry(self, i):
+        return ID_ENTRY.unpack_from(self.buf, self.ids_at + i * ID_ENTRY.size)
+
+    def _record_at(self, i):
+        _, offset, length = self._id_entry(i)
+        return json.loads(self.buf[offset:offset + length])
+
+    def _find_id(self, host_id):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_entry(mid)[0] < host_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._id_entry(lo)[0] == host_id:
+            return lo
+        return None
+
+    def _ids_for_hash(self, table_at, count, h):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY_ENTRY.unpack_from(self.buf, table_at + mid * KEY_ENTRY.size)[0] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < count:
+            entry_hash, host_id = KEY_ENTRY.unpack_from(self.buf, table_at + lo * KEY_ENTRY.size)
+            if entry_hash != h:
+                break
+            yield host_id
+            lo += 1
+
+    def get(self, host_id):
+        """Decode and return one record, or None"""
+        i = self._find_id(host_id)
+        return self._record_at(i) if i is not None else None
+
+    def nickname_ids(self, nickname):
+        """Return the IDs with this nickname, ascending"""
+        # Hash matches are confirmed against the record to rule out collisions
+        return [
+            host_id for host_id in sorted(self._ids_for_hash(self.nicks_at, self.nick_count, _hash(nickname)))
+            if self.get(host_id).get("nickname") == nickname
+        ]
+
+    def connection_ids(self, connection):
+        """Return the IDs with this 'user@host', ascending"""
+        return [
+            host_id for host_id in sorted(self._ids_for_hash(self.conns_at, self.conn_count, _hash(connection)))
+            if _connection(self.get(host_id)) == connection
+        ]
+
+    def find_nickname(self, nickname):
+        ids = self.nickname_ids(nickname)
+        return ids[0] if ids else None
+
+    def find_connection(self, connection):
+        ids = self.connection_ids(connection)
+        return ids[0] if ids else None
+
+    def tag_ids(self, tag):
+        """Return the IDs carrying tag, ascending, without decoding any record"""
+        h = _hash(tag)
+        name = tag.encode()
+        lo, hi = 0, self.tag_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if TAG_ENTRY.unpack_from(self.buf, self.tags_at + mid * TAG_ENTRY.size)[0] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.tag_count:
+            entry_hash, offset, count = TAG_ENTRY.unpack_from(self.buf, self.tags_at + lo * TAG_ENTRY.size)
+            if entry_hash != h:
+                break
+            # The stored name rules out hash collisions
+            length = NAME_LENGTH.unpack_from(self.buf, offset)[0]
+            start = offset + NAME_LENGTH.size
+            if self.buf[start:start + length] == name:
+                return list(struct.unpack_from(f"<{count}q", self.buf, start + length))
+            lo += 1
+        return []
+
+    def jump_ids(self, jump_id):
+        """Return the IDs whose jump host is jump_id, ascending"""
+        lo, hi = 0, self.jump_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if JUMP_ENTRY.unpack_from(self.buf, self.jumps_at + mid * JUMP_ENTRY.size)[0] < jump_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        ids = []
+        while lo < self.jump_count:
+            entry_jump, host_id = JUMP_ENTRY.unpack_from(self.buf, self.jumps_at + lo * JUMP_ENTRY.size)
+            if entry_jump != jump_id:
+                break
+            ids.append(host_id)
+            lo += 1
+        return ids
+
+    def max_id(self):
+        return self._id_entry(self.count - 1)[0] if self.count else 0
+
+    def ids(self):
+        return [entry[0] for entry in ID_ENTRY.iter_unpack(self.buf[self.ids_at:self.nicks_at])]
+
+    def items(self):
+        """Yield (id, record) in ID order, decoding one record at a time"""
+        buf = self.buf
+        for host_id, offset, length in ID_ENTRY.iter_unpack(buf[self.ids_at:self.nicks_at]):
+            yield host_id, json.loads(buf[offset:offset + length])
+
+class Overlay:
+    """
+    A snapshot with journal changes applied on top in memory.
+    changes maps IDs to their new record, or None if deleted.
+    """
+
+    def __init__(self, base, changes):
+        self.base = base
+        self.changes = changes
+        self.records = {host_id: data for host_id, data in changes.items() if data is not None}
+
+    def _merge(self, base_ids, match):
+        """base_ids the journal left alone plus journal records that match, ascending"""
+        ids = [host_id for host_id in base_ids if host_id not in self.changes]
+        ids.extend(host_id for host_id, data in self.records.items() if match(data))
+        return sorted(ids)
+
+    def get(self, host_id):
+        if host_id in self.changes:
+            return self.changes[host_id]
+        return self.base.get(host_id)
+
+    def find_nickname(self, nickname):
+        ids = self._merge(self.base.nickname_ids(nickname), lambda data: data.get("nickname") == nickname)
+        return ids[0] if ids else None
+
+    def find_connection(self, connection):
+        ids = self._merge(self.base.connection_ids(connection), lambda data: _connection(data) == connection)
+        return ids[0] if ids else None
+
+    def tag_ids(self, tag):
+        return self._merge(self.base.tag_ids(tag), lambda data: tag in (data.get("tags") or ()))
+
+    def jump_ids(self, jump_id):
+        return self._merge(self.base.jump_ids(jump_id), lambda data: data.get("jump") == jump_id)
+
+    def max_id(self):
+        # Step down past base IDs the journal deleted
+        i = self.base.count - 1
+        while i >= 0 and self.changes.get(self.base._id_entry(i)[0], True) is None:
+            i -= 1
+        base_max = self.base._id_entry(i)[0] if i >= 0 else 0
+        return max(base_max, max(self.records, default=0))
+
+    def ids(self):
+        return self._merge(self.base.ids(), lambda data: True)
+
+    def items(self):
+        import heapq
+        base = ((host_id, data) for host_id, data in self.base.items() if host_id not in self.changes)
+        return heapq.merge(base, sorted(self.records.items()), key=lambda item: item[0])
@@ -0,0 +1,13 @@
+"""
+Helpers for the owner-only Unix sockets used by the agent and askpass
+"""
+import os
+import socket
+import struct
+
+def peer_uid(conn):
+    """Return the UID of the connecting process, where the OS exposes it"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return os.getuid()
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
@@ -0,0 +1,54 @@
+"""
+ssh command construction
+
+Kept free of Typer, Rich and cryptography imports so the fast connect
+path in __main__ can build an argv and exec ssh without loading them.
+"""
+from . import mux
+
+def build_ssh_command(host_data, refresh_dns=False):
+    """
+    Build the ssh argv for a host record, ending with 'user@host'.
+    Passwords are not handled here. A fresh cached address for the host
+    name is passed as HostName; refresh_dns re-resolves a stale one in
+    the background (for interactive connects). Raises JumpError if the
+    host's jump host is missing.
+    """
+    ssh_command = ["ssh"]
+    
+    # Add SSH key if provided (MUTUALLY EXCLUSIVE with password)
+    if host_data.get("ssh_key"):
+        ssh_command.extend(["-i", host_data["ssh_key"]])
+    
+    ssh_command.extend(["-o", "StrictHostKeyChecking=no", "-o", "UserKnownHostsFile=/dev/null"])
+    
+    # Share one authenticated connection per host
+    if mux.enabled():
+        ssh_command.extend(mux.ssh_options(host_data))
+    
+    if host_data.get("jump"):
+        # Through the bastion's shared connection
+        from .jump import proxy_command
+        ssh_command.extend(["-o", f"ProxyCommand={proxy_command(host_data)}"])
+    else:
+        # Skip ssh's own DNS lookup when 'divein resolve' cached the name
+        from .resolver import ssh_options
+        ssh_command.extend(ssh_options(host_data, refresh=refresh_dns))
+    
+    # Add port
+    ssh_command.extend(["-p", str(host_data["port"])])
+    
+    # Add connection string
+    ssh_command.append(f"{host_data['username']}@{host_data['host']}")
+    return ssh_command
+
+def needs_password(host_data):
+    """
+    True if connecting requires supplying a password, i.e. the host
+    has no SSH key, has a stored password and no live shared connection.
+    """
+    if host_data.get("ssh_key"):
+        return False
+    if not (host_data.get("encrypted_password") or host_data.get("password")):
+        return False
+    return not mux.is_alive(host_data)
@@ -0,0 +1,245 @@
+"""
+Per-host connection stats: use count, last use and connect latency
+
+Kept apart from the host database so a connect never rewrites it. Each
+connect appends one line to ~/.divein/stats.log; once the log passes
+MAX_LOG_LINES it is folded into ~/.divein/stats.json.
+
+Latency is spawn to shell: ssh runs LocalCommand 'touch <ready file>'
+once the session is up, and the file's mtime minus the spawn time is
+read back when the log is next loaded. Reused (multiplexed) connections
+skip LocalCommand, so they count as uses without a latency sample. So
+do hosts whose ssh config sets a LocalCommand of its own, since the
+command line would override it.
+
+Frecency is an exponentially decaying use count: every connect adds 1
+and the total halves every HALF_LIFE seconds.
+"""
+import glob
+import json
+import os
+import shlex
+import subprocess
+import time
+from .database import DB_DIR
+
+STATS_FILE = DB_DIR / "stats.json"
+STATS_LOG = DB_DIR / "stats.log"
+READY_DIR = DB_DIR / "ready"
+
+HALF_LIFE = 7 * 86400
+MAX_LOG_LINES = 50
+# Seconds a session may take to reach its shell; a fold leaves younger
+# events without a ready file in the log, and removes ready files older
+# than this that no event is waiting for
+READY_GRACE = 120
+# Weight of the newest sample in the latency moving average
+LATENCY_WEIGHT = 0.3
+
+def _read_json():
+    try:
+        with open(STATS_FILE, 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _read_log():
+    events = []
+    try:
+        with open(STATS_LOG, 'r') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue # Torn line from a crash mid-append
+    except FileNotFoundError:
+        pass
+    return events
+
+def _latency(event):
+    """Connect latency in ms for an event, or None if ssh never got a shell"""
+    try:
+        ready = os.stat(READY_DIR / event["token"]).st_mtime
+    except (KeyError, OSError):
+        return None
+    return max(0.0, (ready - event["t"]) * 1000)
+
+def _apply(stats, event):
+    entry = stats.setdefault(event["id"], {"count": 0, "last": 0, "score": 0.0})
+    t = event["t"]
+    entry["score"] = decayed(entry, t) + 1
+    entry["count"] += 1
+    entry["last"] = max(entry["last"], t)
+    latency = _latency(event)
+    if latency is not None:
+        entry["latency_ms"] = round(latency if "latency_ms" not in entry else
+                                    entry["latency_ms"] + LATENCY_WEIGHT * (latency - entry["latency_ms"]), 1)
+
+def decayed(entry, now):
+    """An entry's frecency score as of now"""
+    if not entry.get("score"):
+        return 0.0
+    return entry["score"] * 0.5 ** (max(0.0, now - entry["last"]) / HALF_LIFE)
+
+def load_stats():
+    """Return {host_id: {"count", "last", "score", "latency_ms"?}}"""
+    stats = _read_json()
+    for event in _read_log():
+        _apply(stats, event)
+    return stats
+
+def rank(stats=None, now=None):
+    """Host IDs with stats, most frecent first"""
+    stats = load_stats() if stats is None else stats
+    now = time.time() if now is None else now
+    return sorted(stats, key=lambda host_id: (-decayed(stats[host_id], now), host_id))
+
+def describe(entry, now=None):
+    """One-line summary of an entry, e.g. '12 connects, last 3h ago, ~340 ms'"""
+    from .probe import format_age
+    now = time.time() if now is None else now
+    text = f"{entry['count']} connect{'s' if entry['count'] != 1 else ''}, last {format_age(now - entry['last'])} ago"
+    if "latency_ms" in entry:
+        text += f", ~{entry['latency_ms']:.0f} ms"
+    return text
+
+def _write(stats):
+    tmp = f"{STATS_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({str(k): v for k, v in stats.items()}, f)
+    os.replace(tmp, STATS_FILE)
+
+def _lock(mode):
+    """Hold the stats lock: shared for appends, exclusive for a fold"""
+    import fcntl
+    DB_DIR.mkdir(exist_ok=True)
+    lock = open(f"{STATS_FILE}.lock", 'w')
+    fcntl.flock(lock, mode)
+    return lock
+
+def fold(remap=None):
+    """
+    Fold the log into stats.json and drop the ready files it used.
+    Events still waiting for their session's ready file stay in the log.
+    remap, if given, maps old host IDs to new ones; others are dropped.
+    """
+    import fcntl
+    with _lock(fcntl.LOCK_EX):
+        now = time.time()
+        events = _read_log()
+        pending = [event for event in events
+                   if "token" in event and now - event["t"] < READY_GRACE and _latency(event) is None]
+        waiting = {event["token"] for event in pending}
+        folded = {event["token"] for event in events if "token" in event} - waiting
+        stats = _read_json()
+        for event in events:
+            if event.get("token") not in waiting:
+                _apply(stats, event)
+        if remap is not None:
+            stats = {remap[host_id]: entry for host_id, entry in stats.items() if host_id in remap}
+            for event in pending:
+                event["id"] = remap.get(event["id"])
+            pending = [event for event in pending if event["id"] is not None]
+        _write(stats)
+        if pending:
+            tmp = f"{STATS_LOG}.tmp"
+            with open(tmp, 'w') as f:
+                f.writelines(json.dumps(event) + "\n" for event in pending)
+            os.replace(tmp, STATS_LOG)
+        elif os.path.exists(STATS_LOG):
+            os.unlink(STATS_LOG)
+
+        # Ready files of folded events, and strays whose event was lost
+        # or never written (e.g. a crash between the two)
+        waiting = {event["token"] for event in pending}
+        try:
+            entries = list(os.scandir(READY_DIR))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.name in waiting:
+                continue
+            try:
+                if entry.name in folded or now - entry.stat().st_mtime >= READY_GRACE:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+def _may_set_local_command():
+    """
+    False if no ssh config file could give a host a LocalCommand, which
+    spares running 'ssh -G' on most connects
+    """
+    system = "/etc/ssh/ssh_config"
+    for path in [os.path.expanduser("~/.ssh/config"), system] + sorted(glob.glob("/etc/ssh/ssh_config.d/*.conf")):
+        try:
+            with open(path, 'r') as f:
+                text = f.read().lower()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if "localcommand" in text:
+            return True
+        for line in text.splitlines():
+            words = line.replace("=", " ").split()
+            # Includes other than the standard ssh_config.d one weren't read
+            if words and words[0] == "include" and words[1:] != ["/etc/ssh/ssh_config.d/*.conf"]:
+                return True
+    return False
+
+def has_local_command(host_data):
+    """True if the user's ssh config sets a LocalCommand for the host"""
+    if not _may_set_local_command():
+        return False
+    try:
+        result = subprocess.run(
+            ["ssh", "-G", "-p", str(host_data["port"]), f"{host_data['username']}@{host_data['host']}"],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return True # Can't tell; leave the user's config alone
+    return result.returncode != 0 or any(line.startswith("localcommand ") for line in result.stdout.splitlines())
+
+def record_connect(host_id, latency=True):
+    """
+    Log a connect to host_id starting now. With latency, returns ssh
+    options that mark the moment the session is up; otherwise [].
+    """
+    import fcntl
+    READY_DIR.mkdir(parents=True, exist_ok=True, mode=0o700)
+    try:
+        with open(STATS_LOG, 'rb') as f:
+            # Fold before appending: this connect's ready file doesn't exist yet
+            if f.read().count(b"\n") >= MAX_LOG_LINES:
+                fold()
+    except FileNotFoundError:
+        pass
+    event = {"id": host_id, "t": time.time()}
+    if latency:
+        event["token"] = f"{os.getpid()}-{time.time_ns()}"
+    # Shared lock: appends don't exclude each other, only a fold
+    with _lock(fcntl.LOCK_SH), open(STATS_LOG, 'a') as f:
+        f.write(json.dumps(event) + "\n")
+    if not latency:
+        return []
+    # ssh expands %-tokens in LocalCommand
+    ready = shlex.quote(str(READY_DIR / event["token"])).replace("%", "%%")
+    return ["-o", "PermitLocalCommand=yes", "-o", f"LocalCommand=touch {ready}"]
+
+def on_connect(host_id, host_data, ssh_command):
+    """
+    Hook for every interactive connect: record stats (adding their ssh
+    options to ssh_command in place) and start pre-warming other hosts.
+    A LocalCommand from the user's ssh config is never overridden; such
+    hosts are counted without a latency sample.
+    """
+    from .config import get_setting
+    if host_id is None:
+        return
+    if get_setting("stats"):
+        try:
+            ssh_command[1:1] = record_connect(host_id, latency=not has_local_command(host_data))
+        except OSError:
+            pass # Stats are best-effort; never block a connect
+    if get_setting("prewarm"):
+        from . import prewarm
+        prewarm.start_in_background(exclude=host_id)
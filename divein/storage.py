@@ -0,0 +1,556 @@
+"""
+Storage backends for the host database
+
+Every backend stores the same {id: record} mapping. Besides whole-database
+load/save they expose single-record writes and indexed lookups so the
+common paths (connect, add, update) don't have to touch every host.
+
+Deleting a host leaves a tombstone: a next_id high-water mark past every
+ID ever deleted, so IDs are never handed out twice. Only an explicit
+renumber (set_next_id) moves it back.
+"""
+import fcntl
+import json
+import os
+import sys
+
+def write_json_atomic(path, data):
+    """Write data as JSON to a temp file and rename it over path"""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class JsonStorage:
+    """The original single-file JSON store"""
+
+    name = "json"
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_path = f"{path}.idx"
+        self.meta_path = f"{path}.meta"
+        self._cache = None
+        self._snapshot = (None, None)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        # Parse once per process and file version; lookups share the result
+        signature = self._signature()
+        if self._cache is None or self._cache[0] != signature:
+            self._cache = [signature, self._read(), None]
+        return self._cache[1]
+
+    def _load_index(self):
+        from .database import HostIndex
+        database = self._load()
+        if self._cache[2] is None:
+            self._cache[2] = HostIndex(database)
+        return self._cache[2]
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        # Convert keys to integers for proper sorting
+        return {int(k): v for k, v in data.items()}
+
+    def load(self):
+        # Shallow copy so callers can add/remove keys without touching the cache
+        return dict(self._load())
+
+    def save(self, data):
+        write_json_atomic(self.path, data)
+        self._cache = None
+
+    def _reader(self):
+        """
+        Return an object answering get/find_nickname/find_connection/max_id:
+        the in-memory index if this process already parsed the current
+        file, else the binary snapshot, rebuilding it when stale.
+        """
+        from . import snapshot
+        signature = self._signature()
+        if self._cache is not None and self._cache[0] == signature and self._cache[2] is not None:
+            return self._cache[2]
+        # Keep the mapped snapshot while the file is unchanged, so lookup
+        # loops cost one stat each
+        if self._snapshot[1] is not None and self._snapshot[0] == signature:
+            return self._snapshot[1]
+        reader = snapshot.Snapshot.open(self.snapshot_path, signature)
+        if reader is not None:
+            self._snapshot = (signature, reader)
+            return reader
+        database = self._load()
+        try:
+            snapshot.write(self.snapshot_path, signature, database)
+            reader = snapshot.Snapshot.open(self.snapshot_path, signature)
+            self._snapshot = (signature, reader)
+        except OSError:
+            pass # Read-only location; lookups still work from memory
+        return reader or self._load_index()
+
+    def get(self, host_id):
+        return self._reader().get(host_id)
+
+    def find_nickname(self, nickname):
+        return self._reader().find_nickname(nickname)
+
+    def find_connection(self, connection):
+        return self._reader().find_connection(connection)
+
+    def max_id(self):
+        return self._reader().max_id()
+
+    def tag_ids(self, tag):
+        return self._reader().tag_ids(tag)
+
+    def jump_ids(self, jump_id):
+        return self._reader().jump_ids(jump_id)
+
+    def ids(self):
+        return self._reader().ids()
+
+    def items(self):
+        return self._reader().items()
+
+    def _stored_next_id(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f).get("next_id", 1)
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def next_id(self):
+        return max(self._stored_next_id(), self.max_id() + 1)
+
+    def set_next_id(self, next_id):
+        write_json_atomic(self.meta_path, {"next_id": next_id})
+
+    def _tombstone(self, ids):
+        # Written before the records go, so a crash can't free their IDs
+        high = max(ids, default=0) + 1
+        if high > self._stored_next_id():
+            self.set_next_id(high)
+
+    def put(self, host_id, record, database=None):
+        self.put_many({host_id: record}, database)
+
+    def put_many(self, records, database=None):
+        if database is None:
+            database = self.load()
+        database.update(records)
+        self.save(database)
+
+    def delete(self, ids, database=None, updates=None):
+        self._tombstone(ids)
+        if database is None:
+            database = self.load()
+        for host_id in ids:
+            database.pop(host_id, None)
+        database.update(updates or {})
+        self.save(database)
+
+class JournalStorage(JsonStorage):
+    """
+    JSON snapshot plus an append-only JSON-lines journal.
+
+    Each write appends one {"op": "put"|"del", ...} line, so a mutation
+    costs O(1) regardless of inventory size. Loading replays the journal
+    over the snapshot. Once the journal passes max_ops lines or max_bytes,
+    it is rotated aside and folded into a new snapshot by a forked child,
+    written via atomic rename.
+
+    Appends hold the append lock shared and the rotation holds it
+    exclusively, so no write can land in a journal that is being folded.
+    The line count for max_ops is kept running from the last load or
+    append, so only lines other processes added since are read.
+
+    Lookups (get, nickname, next ID, ...) never replay into a full load:
+    the binary snapshot is keyed on the base file alone, which only
+    compaction rewrites, and the journal's changes are laid over it in
+    memory. The compactor writes the new snapshot itself.
+    """
+
+    name = "journal"
+
+    def __init__(self, path, max_ops=1000, max_bytes=1024 * 1024):
+        super().__init__(path)
+        self.journal = f"{path}.journal"
+        self.rotated = f"{path}.journal.old"
+        self.lock_path = f"{path}.lock"
+        self.append_lock_path = f"{path}.journal.lock"
+        self.max_ops = max_ops
+        self.max_bytes = max_bytes
+        # (inode, size, lines) of the journal as last seen by this process
+        self._count = None
+        self._overlay = (None, None)
+
+    def _signature(self):
+        signature = []
+        for path in (self.path, self.rotated, self.journal):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    @staticmethod
+    def _replay(database, journal, keep_deleted=False):
+        """
+        Apply a journal to database. With keep_deleted, deleted IDs map
+        to None instead of being removed. Returns (inode, size, lines)
+        read, or None.
+        """
+        try:
+            f = open(journal, 'rb')
+        except FileNotFoundError:
+            return None
+        lines = 0
+        with f:
+            for line in f:
+                lines += line.endswith(b"\n")
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn line from a crash mid-append
+                    continue
+                if entry["op"] == "put":
+                    database[entry["id"]] = entry["record"]
+                elif entry["op"] == "del":
+                    if keep_deleted:
+                        database[entry["id"]] = None
+                    else:
+                        database.pop(entry["id"], None)
+            return os.fstat(f.fileno()).st_ino, f.tell(), lines
+
+    def _read(self):
+        database = super()._read()
+        self._replay(database, self.rotated)
+        self._count = self._replay(database, self.journal)
+        return database
+
+    def _reader(self):
+        """
+        Like JsonStorage._reader, but the snapshot is keyed on the base
+        file only and the journals are replayed over it in memory, so
+        an append costs the next lookup one small journal read instead
+        of a full load and snapshot rebuild.
+        """
+        from . import snapshot
+        signature = self._signature()
+        if self._cache is not None and self._cache[0] == signature and self._cache[2] is not None:
+            return self._cache[2]
+        if self._overlay[0] == signature:
+            return self._overlay[1]
+        base_signature = signature[0]
+        if self._snapshot[1] is not None and self._snapshot[0] == base_signature:
+            base = self._snapshot[1]
+        else:
+            base = snapshot.Snapshot.open(self.snapshot_path, base_signature)
+            if base is None:
+                try:
+                    snapshot.write(self.snapshot_path, base_signature, super()._read())
+                    base = snapshot.Snapshot.open(self.snapshot_path, base_signature)
+                except OSError:
+                    pass
+            if base is None:
+                # Read-only location; lookups still work from memory
+                return self._load_index()
+            self._snapshot = (base_signature, base)
+        changes = {}
+        self._replay(changes, self.rotated, keep_deleted=True)
+        self._count = self._replay(changes, self.journal, keep_deleted=True)
+        reader = snapshot.Overlay(base, changes)
+        self._overlay = (signature, reader)
+        return reader
+
+    def _write_snapshot(self, database):
+        """Snapshot a freshly written base file, sparing the next reader"""
+        from . import snapshot
+        try:
+            snapshot.write(self.snapshot_path, super()._signature(), database)
+        except OSError:
+            pass
+
+    def _lines_before(self, f, end):
+        """Complete lines in the open journal f up to byte end"""
+        inode = os.fstat(f.fileno()).st_ino
+        if self._count and self._count[0] == inode and self._count[1] <= end:
+            # Only what other processes appended since we last looked
+            start, lines = self._count[1], self._count[2]
+        else:
+            start, lines = 0, 0
+        f.seek(start)
+        return lines + f.read(end - start).count(b"\n")
+
+    def _append(self, entries):
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        with open(self.append_lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            # Opened under the lock, so never a journal already rotated away
+            with open(self.journal, 'ab+') as f:
+                end = f.seek(0, os.SEEK_END)
+                if end > 0:
+                    f.seek(end - 1)
+                    if f.read(1) != b"\n":
+                        # Terminate a torn line so it can't swallow this entry
+                        data = b"\n" + data
+                lines = self._lines_before(f, end) + data.count(b"\n")
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+                # Concurrent appenders may each miss the other's lines;
+                # the count only has to be close enough to trigger compaction
+                self._count = (os.fstat(f.fileno()).st_ino, size, lines)
+        self._cache = None
+        if size >= self.max_bytes or lines >= self.max_ops:
+            self._compact_in_background()
+
+    def _compact_in_background(self):
+        lock = open(self.lock_path, 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another process is already compacting
+            lock.close()
+            return
+        if os.path.exists(self.rotated):
+            # A previous compaction died before finishing; fold it in first
+            self._compact_rotated()
+        # New writes go to a fresh journal while the child compacts the old
+        # one; waiting out in-flight appends so none lands in the old one
+        with open(self.append_lock_path, 'w') as append_lock:
+            fcntl.flock(append_lock, fcntl.LOCK_EX)
+            os.replace(self.journal, self.rotated)
+        self._count = None
+        pid = os.fork()
+        if pid == 0:
+            # Double fork so the compactor is never left as a zombie
+            try:
+                if os.fork() == 0:
+                    self._compact_rotated()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        lock.close()
+
+    def _compact_rotated(self):
+        database = super()._read()
+        self._replay(database, self.rotated)
+        write_json_atomic(self.path, database)
+        self._write_snapshot(database)
+        os.unlink(self.rotated)
+
+    def save(self, data):
+        with open(self.lock_path, 'w') as lock, open(self.append_lock_path, 'w') as append_lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            fcntl.flock(append_lock, fcntl.LOCK_EX)
+            write_json_atomic(self.path, data)
+            self._write_snapshot(data)
+            for path in (self.rotated, self.journal):
+                if os.path.exists(path):
+                    os.unlink(path)
+        self._cache = None
+        self._count = None
+
+    def put_many(self, records, database=None):
+        self._append([{"op": "put", "id": host_id, "record": record} for host_id, record in records.items()])
+
+    def delete(self, ids, database=None, updates=None):
+        self._tombstone(ids)
+        self._append([{"op": "del", "id": host_id} for host_id in ids] +
+                     [{"op": "put", "id": host_id, "record": record} for host_id, record in (updates or {}).items()])
+
+class SqliteStorage:
+    """
+    SQLite store with one row per host.
+    Nickname, user/host and jump columns are indexed; the full record is
+    kept as JSON in the data column so new fields need no schema change.
+    Tags are also kept in a (tag, id) table, updated with each write.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS hosts (
+            id INTEGER PRIMARY KEY,
+            nickname TEXT,
+            username TEXT,
+            host TEXT,
+            data TEXT NOT NULL,
+            jump INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_hosts_nickname ON hosts(nickname);
+        CREATE INDEX IF NOT EXISTS idx_hosts_connection ON hosts(username, host);
+        CREATE TABLE IF NOT EXISTS tags (
+            tag TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (tag, id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_tags_id ON tags(id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        );
+    """
+
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self.legacy_json = legacy_json
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            import sqlite3
+            self._conn = sqlite3.connect(str(self.path), isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+            self._add_jump_column()
+            self._migrate_json()
+        return self._conn
+
+    def _add_jump_column(self):
+        """Give stores created before jump hosts an indexed jump column"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(hosts)")]
+        if "jump" not in columns:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute("ALTER TABLE hosts ADD COLUMN jump INTEGER")
+                rows = self._conn.execute("SELECT id, data FROM hosts").fetchall()
+                self._conn.executemany(
+                    "UPDATE hosts SET jump = ? WHERE id = ?",
+                    ((json.loads(data).get("jump"), host_id) for host_id, data in rows if '"jump"' in data)
+                )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hosts_jump ON hosts(jump)")
+
+    def _migrate_json(self):
+        """One-shot import of an existing database.json into an empty store"""
+        if not self.legacy_json or not os.path.exists(self.legacy_json):
+            return
+        if self._conn.execute("SELECT 1 FROM hosts LIMIT 1").fetchone():
+            return
+        with open(self.legacy_json, 'r') as f:
+            data = json.load(f)
+        self._replace_all(self._conn, {int(k): v for k, v in data.items()})
+        os.replace(self.legacy_json, f"{self.legacy_json}.migrated")
+        # stderr, so it never lands inside 'divein export' output
+        print(f"Migrated {len(data)} host(s) from {self.legacy_json}", file=sys.stderr)
+
+    @staticmethod
+    def _row(host_id, record):
+        return (
+            host_id,
+            record.get("nickname") or None,
+            record.get("username"),
+            record.get("host"),
+            json.dumps(record),
+            record.get("jump") or None,
+        )
+
+    @staticmethod
+    def _tag_rows(records):
+        return ((tag, host_id) for host_id, record in records.items() for tag in record.get("tags") or ())
+
+    def _replace_all(self, conn, data):
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM hosts")
+            conn.execute("DELETE FROM tags")
+            conn.executemany(
+                "INSERT INTO hosts (id, nickname, username, host, data, jump) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._row(host_id, record) for host_id, record in data.items())
+            )
+            conn.executemany("INSERT OR IGNORE INTO tags (tag, id) VALUES (?, ?)", self._tag_rows(data))
+
+    def load(self):
+        rows = self.conn.execute("SELECT id, data FROM hosts ORDER BY id")
+        return {host_id: json.loads(data) for host_id, data in rows}
+
+    def save(self, data):
+        self._replace_all(self.conn, data)
+
+    def _one(self, sql, args):
+        row = self.conn.execute(sql, args).fetchone()
+        return row[0] if row else None
+
+    def get(self, host_id):
+        data = self._one("SELECT data FROM hosts WHERE id = ?", (host_id,))
+        return json.loads(data) if data is not None else None
+
+    def find_nickname(self, nickname):
+        return self._one("SELECT min(id) FROM hosts WHERE nickname = ?", (nickname,))
+
+    def find_connection(self, connection):
+        username, _, host = connection.partition("@")
+        return self._one(
+            "SELECT min(id) FROM hosts WHERE username = ? AND host = ?", (username, host)
+        )
+
+    def max_id(self):
+        return self._one("SELECT max(id) FROM hosts", ()) or 0
+
+    def tag_ids(self, tag):
+        return [row[0] for row in self.conn.execute("SELECT id FROM tags WHERE tag = ? ORDER BY id", (tag,))]
+
+    def jump_ids(self, jump_id):
+        return [row[0] for row in self.conn.execute("SELECT id FROM hosts WHERE jump = ? ORDER BY id", (jump_id,))]
+
+    def next_id(self):
+        stored = self._one("SELECT value FROM meta WHERE key = 'next_id'", ()) or 1
+        return max(stored, self.max_id() + 1)
+
+    def set_next_id(self, next_id):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (next_id,))
+
+    def ids(self):
+        return [row[0] for row in self.conn.execute("SELECT id FROM hosts ORDER BY id")]
+
+    def items(self):
+        for host_id, data in self.conn.execute("SELECT id, data FROM hosts ORDER BY id"):
+            yield host_id, json.loads(data)
+
+    def put(self, host_id, record, database=None):
+        self.put_many({host_id: record})
+
+    def _put_rows(self, records):
+        conn = self.conn
+        conn.executemany(
+            "INSERT OR REPLACE INTO hosts (id, nickname, username, host, data, jump) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._row(host_id, record) for host_id, record in records.items())
+        )
+        conn.executemany("DELETE FROM tags WHERE id = ?", ((host_id,) for host_id in records))
+        conn.executemany("INSERT OR IGNORE INTO tags (tag, id) VALUES (?, ?)", self._tag_rows(records))
+
+    def put_many(self, records, database=None):
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._put_rows(records)
+
+    def delete(self, ids, database=None, updates=None):
+        ids = list(ids)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', "
+                "max(?, coalesce((SELECT value FROM meta WHERE key = 'next_id'), 1)))",
+                (max(ids, default=0) + 1,)
+            )
+            self.conn.executemany("DELETE FROM hosts WHERE id = ?", ((i,) for i in ids))
+            self.conn.executemany("DELETE FROM tags WHERE id = ?", ((i,) for i in ids))
+            if updates:
+                self._put_rows(updates)
@@ -0,0 +1,157 @@
+"""
+Phase timings for a divein invocation
+
+Enabled with the global --timings flag (summary on stderr) or the
+DIVEIN_TRACE environment variable: "1" for the summary, or a file path to
+append one JSON line per invocation. Phases are recorded with
+time.perf_counter() relative to the start of the process's main().
+
+When tracing is off, span() returns a shared no-op context manager and
+mark() returns after a single check, so the hooks can stay in hot paths.
+"""
+import os
+import sys
+import time
+
+# (name, start, end, depth) while tracing, else None
+_events = None
+_depth = 0
+_t0 = None
+_output = None
+
+class _Span:
+    __slots__ = ("name", "start", "depth")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _depth
+        self.depth = _depth
+        _depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _depth
+        end = time.perf_counter()
+        _depth -= 1
+        if _events is not None:
+            _events.append((self.name, self.start, end, self.depth))
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name):
+    """Context manager timing one phase"""
+    if _events is None:
+        return _NO_SPAN
+    return _Span(name)
+
+def timed(name):
+    """Decorator timing every call of a function as one phase"""
+    def decorate(func):
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorate
+
+def mark(name):
+    """Record a point in time, e.g. an event seen from another thread"""
+    if _events is not None:
+        now = time.perf_counter()
+        _events.append((name, now, now, _depth))
+
+def enabled():
+    return _events is not None
+
+def setup(argv, t0=None):
+    """
+    Start tracing if --timings is among divein's own options (removed
+    from argv) or DIVEIN_TRACE is set. Anything after '--' belongs to
+    the remote command and is left alone. t0 is the perf_counter()
+    value to measure from.
+    """
+    global _events, _t0, _output
+    output = None
+    options = argv[:argv.index("--")] if "--" in argv else argv
+    if "--timings" in options[1:]:
+        del argv[options.index("--timings", 1)]
+        output = "summary"
+    else:
+        value = os.environ.get("DIVEIN_TRACE", "")
+        if value.lower() in ("1", "true", "yes", "summary"):
+            output = "summary"
+        elif value and value.lower() not in ("0", "false", "no"):
+            output = os.path.expanduser(value)
+    if output is None:
+        return
+
+    import atexit
+    _events = []
+    _t0 = t0 if t0 is not None else time.perf_counter()
+    _output = output
+    atexit.register(finish)
+
+def finish():
+    """
+    Write the recorded phases and stop tracing. Called at exit, and
+    before exec'ing ssh since atexit handlers don't survive exec.
+    """
+    global _events
+    if _events is None:
+        return
+    events, _events = _events, None
+    total = time.perf_counter() - _t0
+    events.sort(key=lambda e: (e[1], e[3]))
+
+    if _output == "summary":
+        lines = ["divein timings (ms from start)"]
+        for name, start, end, depth in events:
+            label = "  " * depth + name
+            offset = (start - _t0) * 1000
+            if end == start:
+                lines.append(f"  {label:<30} @{offset:8.1f}")
+            else:
+                lines.append(f"  {label:<30} @{offset:8.1f} {(end - start) * 1000:9.1f}")
+        lines.append(f"  {'total':<30} {'':9} {total * 1000:9.1f}")
+        sys.stderr.write("\n".join(lines) + "\n")
+        sys.stderr.flush()
+        return
+
+    import json
+    entry = {
+        "time": time.time(),
+        "pid": os.getpid(),
+        "argv": sys.argv[1:],
+        "total_ms": round(total * 1000, 3),
+        "phases": [
+            {
+                "name": name,
+                "depth": depth,
+                "start_ms": round((start - _t0) * 1000, 3),
+                "ms": round((end - start) * 1000, 3),
+            }
+            for name, start, end, depth in events
+        ],
+    }
+    try:
+        with open(_output, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        sys.stderr.write(f"divein: cannot write trace to {_output}: {e}\n")
@@ -0,0 +1,315 @@
+"""
+Vault - master-password unlocking shared by every encrypted host
+
+The vault header in ~/.divein/vault.json holds a single key-encryption key
+(KEK), wrapped by a key derived from the master password with the KDF
+parameters stored next to it. Host records store their password under a
+random data key that the KEK wraps, so a whole session costs one KDF run
+no matter how many hosts it touches. Records still using the old per-host
+salt are re-encrypted into the vault the first time they are unlocked.
+"""
+import json
+import os
+import typer
+from .database import DB_DIR, ensure_db_dir, save_hosts
+from .crypto import (
+    create_vault, unlock_vault, check_vault_key, encrypt_with_vault,
+    decrypt_with_vault, derive_key, decrypt_with_key, decrypt_password,
+    wrap_vault_key, vault_id, DEFAULT_KDF
+)
+from .config import get_setting
+from . import agent, trace
+
+VAULT_FILE = DB_DIR / "vault.json"
+
+# Save legacy hosts moved into the vault by rekey at most this often (seconds)
+REKEY_BATCH_INTERVAL = 2.0
+
+# Unlocked state for this process, so bulk operations prompt once
+_kek = None
+_master_password = None
+
+def _write_private(path, data):
+    """Atomically write JSON readable by the owner only"""
+    ensure_db_dir()
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+def load_header():
+    """Return the vault header, or None if no vault exists yet"""
+    if not VAULT_FILE.exists():
+        return None
+    with open(VAULT_FILE, 'r') as f:
+        return json.load(f)
+
+def save_header(header):
+    """Atomically write the vault header"""
+    _write_private(VAULT_FILE, header)
+
+def is_legacy(host_data):
+    """True for records encrypted with their own per-host salt"""
+    return bool(host_data.get("encrypted_password") and host_data.get("encryption_salt"))
+
+def get_master_password(confirm=False):
+    """Prompt for the master password once per process (on stderr, so
+    piped output such as 'divein export' stays clean)"""
+    global _master_password
+    if _master_password is None:
+        _master_password = typer.prompt("Enter Master Password", hide_input=True,
+                                        confirmation_prompt=confirm, err=True)
+    return _master_password
+
+def kdf_params():
+    """KDF parameters for new vaults, from the kdf_* settings"""
+    algorithm = get_setting("kdf_algorithm")
+    if algorithm == "scrypt":
+        return {
+            "algorithm": "scrypt",
+            "n": get_setting("kdf_scrypt_n"),
+            "r": get_setting("kdf_scrypt_r"),
+            "p": get_setting("kdf_scrypt_p"),
+        }
+    return {"algorithm": algorithm, "iterations": get_setting("kdf_iterations")}
+
+def vault_kdf(header):
+    """KDF parameters a vault header was written with"""
+    return header.get("kdf") or DEFAULT_KDF
+
+def migrate_kdf(header, kek, master_password, kdf=None):
+    """
+    Rewrap the KEK of the vault described by header under new KDF
+    parameters (default: the configured ones). Host records keep working
+    unchanged. Returns False if the vault changed meanwhile.
+    """
+    current = load_header()
+    if current is None or current.get("check") != header.get("check"):
+        return False
+    save_header(wrap_vault_key(current, kek, master_password, kdf or kdf_params()))
+    return True
+
+def _migrate_kdf_in_background(header, kek, master_password):
+    """Run migrate_kdf in a detached child so the unlock isn't delayed"""
+    pid = os.fork()
+    if pid == 0:
+        # Double fork so the child is never left as a zombie
+        try:
+            if os.fork() == 0:
+                migrate_kdf(header, kek, master_password)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+@trace.timed("vault.unlock")
+def unlock(master_password=None):
+    """
+    Return the vault KEK, creating the vault on first use.
+    Tries the in-process cache, then the agent, then prompts.
+    Raises ValueError on a wrong master password.
+    """
+    global _kek
+    if _kek is not None:
+        return _kek
+    
+    header = load_header()
+    if header is None:
+        # First encrypted host: ask twice so a typo can't lock the vault
+        master_password = master_password or get_master_password(confirm=True)
+        header, kek = create_vault(master_password, kdf_params())
+        save_header(header)
+    else:
+        kek = agent.get_key(vault_id(header))
+        if kek:
+            try:
+                check_vault_key(header, kek)
+            except ValueError:
+                kek = None
+        if not kek:
+            master_password = master_password or get_master_password()
+            kek = unlock_vault(header, master_password)
+            # Settings changed since the vault was written: rewrap its key
+            # with the new ones, off the critical path
+            if vault_kdf(header) != kdf_params() and get_setting("kdf_auto_migrate"):
+                _migrate_kdf_in_background(header, kek, master_password)
+    
+    agent.add_key(vault_id(header), kek)
+    _kek = kek
+    return kek
+
+def encrypt_host_password(password):
+    """
+    Encrypt a password into vault record fields.
+    Returns a dict to merge into the host record.
+    """
+    result = encrypt_with_vault(password, unlock())
+    return {
+        "encrypted_password": result["encrypted_data"],
+        "data_key": result["data_key"],
+        "encryption_salt": None,
+    }
+
+def _decrypt_legacy(host_data):
+    """Decrypt a per-host-salt record, using the agent's key if it has one"""
+    encrypted_password = host_data["encrypted_password"]
+    salt_hex = host_data["encryption_salt"]
+    
+    key = agent.get_key(salt_hex)
+    if key:
+        try:
+            return decrypt_with_key(encrypted_password, key)
+        except ValueError:
+            pass # Stale key, fall back to prompting
+    
+    key, _ = derive_key(get_master_password(), bytes.fromhex(salt_hex), host_data.get("kdf"))
+    password = decrypt_with_key(encrypted_password, key)
+    # Records left under another master password stay legacy; let the
+    # agent answer for them next time instead of prompting again
+    agent.add_key(salt_hex, key)
+    return password
+
+def migrate_record(host_data, password):
+    """Return a copy of a legacy record re-encrypted into the vault"""
+    migrated = dict(host_data)
+    migrated.update(encrypt_host_password(password))
+    return migrated
+
+def decrypt_host_password(host_id, host_data, migrate=True):
+    """
+    Decrypt a host's stored password.
+    Legacy records are transparently moved into the vault unless
+    migrate is False. Raises ValueError on a wrong master password.
+    """
+    if host_data.get("data_key"):
+        return decrypt_with_vault(host_data["encrypted_password"], host_data["data_key"], unlock())
+    
+    password = _decrypt_legacy(host_data)
+    if migrate:
+        migrate_decrypted({host_id: (host_data, password)})
+    return password
+
+def migrate_decrypted(decrypted):
+    """
+    Move legacy records whose passwords were just decrypted into the
+    vault with a single save. decrypted maps host IDs to
+    (host_data, password); vault records in it are ignored.
+    """
+    legacy = {host_id: pair for host_id, pair in decrypted.items() if is_legacy(pair[0])}
+    # Only migrate when it costs no extra prompt (the agent may have
+    # supplied the legacy keys without the master password)
+    if not legacy or (_kek is None and _master_password is None):
+        return
+    try:
+        # The password just proved itself against these records
+        unlock(_master_password)
+    except ValueError:
+        # Records were encrypted with a different master password; leave them as is
+        return
+    save_hosts({host_id: migrate_record(host_data, password)
+                for host_id, (host_data, password) in legacy.items()})
+
+def migrate_all(database):
+    """
+    Move every legacy record in database into the vault.
+    Returns (migrated, failed) counts.
+    """
+    updates = {}
+    failed = 0
+    for host_id in sorted(database.keys()):
+        host_data = database[host_id]
+        if not is_legacy(host_data):
+            continue
+        try:
+            password = _decrypt_legacy(host_data)
+            updates[host_id] = migrate_record(host_data, password)
+        except ValueError:
+            failed += 1
+    
+    if updates and not save_hosts(updates, database):
+        return 0, failed + len(updates)
+    return len(updates), failed
+
+def _decrypt_legacy_job(args):
+    """Process pool worker: one PBKDF2 run plus decrypt"""
+    host_id, encrypted_password, salt_hex, kdf, master_password = args
+    try:
+        return host_id, decrypt_password(encrypted_password, salt_hex, master_password, kdf)
+    except ValueError:
+        return host_id, None
+
+def rekey(old_password, new_password, database, workers=None, progress=None):
+    """
+    Change the master password.
+
+    The KEK is random, so only its wrapping in the vault header changes:
+    vault hosts are left untouched and the switch is a single atomic
+    header write. Legacy hosts are first moved into the vault under the
+    current KEK, decrypted across a process pool and saved in batches.
+    Every record stays readable with the old password until the header
+    switches, and an interrupted run keeps the batches it saved.
+
+    Returns (rekeyed, failed) counts. Raises ValueError on a wrong old
+    password, OSError if a batch can't be saved.
+    """
+    global _kek, _master_password
+    header = load_header()
+    kek = unlock_vault(header, old_password) if header else None
+
+    in_vault = sum(1 for data in database.values() if data.get("encrypted_password") and data.get("data_key"))
+    legacy = [host_id for host_id in sorted(database) if is_legacy(database[host_id])]
+    total = in_vault + len(legacy)
+    migrated = 0
+    failed = 0
+    if progress:
+        progress(in_vault, total)
+
+    if legacy:
+        import time
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = [
+            (host_id, database[host_id]["encrypted_password"], database[host_id]["encryption_salt"],
+             database[host_id].get("kdf"), old_password)
+            for host_id in legacy
+        ]
+        batch = {}
+
+        def flush():
+            nonlocal migrated
+            if batch and not save_hosts(batch, database):
+                raise OSError("Failed to save re-encrypted hosts")
+            migrated += len(batch)
+            batch.clear()
+
+        last_flush = time.monotonic()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for host_id, password in pool.map(_decrypt_legacy_job, jobs):
+                if password is None:
+                    failed += 1
+                else:
+                    if kek is None:
+                        # The old password just proved itself: the vault
+                        # starts under it, like every other record for now
+                        header, kek = create_vault(old_password, kdf_params())
+                        save_header(header)
+                    result = encrypt_with_vault(password, kek)
+                    batch[host_id] = dict(database[host_id], encrypted_password=result["encrypted_data"],
+                                          data_key=result["data_key"], encryption_salt=None)
+                    if time.monotonic() - last_flush >= REKEY_BATCH_INTERVAL:
+                        flush()
+                        last_flush = time.monotonic()
+                if progress:
+                    progress(in_vault + migrated + len(batch) + failed, total)
+        flush()
+
+    if header is None:
+        # Nothing to check the old password against but the hosts themselves
+        raise ValueError("Invalid Master Password or corrupted data")
+
+    # The switch: one atomic write of the header with the KEK rewrapped
+    save_header(wrap_vault_key(header, kek, new_password, kdf_params()))
+
+    agent.add_key(vault_id(header), kek)
+    _kek = kek
+    _master_password = new_password
+    return in_vault + migrated, failed
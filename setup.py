@@ -35,6 +35,9 @@ setup(
         "cryptography",
         "pexpect",
     ],
+    extras_require={
+        "dns": ["dnspython>=2.0"],
+    },
     entry_points={
         "console_scripts": [
             "divein=divein.__main__:main",